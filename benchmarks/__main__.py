@@ -0,0 +1,222 @@
+"""Benchmark suite of the loader stages on synthetic cross-sections.
+
+Every stage is timed on its own, then once more under tracemalloc for its
+peak memory, and reported as JSON so runs can be compared across commits.
+
+Usage:
+    PYTHONPATH=src python -m benchmarks --gvkeys 3000 --dates 20 --output bench.json
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from benchmarks import synthetic
+from benchmarks.stubs import InMemorySource, InMemoryTarget
+from factor_loader import columnar, compute
+from factor_loader.loader import Loader
+import factor_loader.model as model
+
+TIMEFRAME = "daily"
+
+
+def measure(stage: str, fn: Callable, rows: int, memory: bool = True) -> Dict:
+    """Times a stage and, optionally, its peak memory.
+
+    Args:
+        stage: stage name.
+        fn: stage to run, without arguments.
+        rows: rows processed by one call of the stage.
+        memory: whether to measure peak memory in a second call.
+
+    Returns:
+        Stage metrics.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - start
+
+    peak_bytes = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "stage": stage,
+        "seconds": seconds,
+        "rows": rows,
+        "rows_per_sec": rows / seconds if seconds else None,
+        "peak_bytes": peak_bytes,
+    }
+
+
+def build_loader(tables, engine: str) -> Loader:
+    """Loader on in-memory source and target."""
+    os.environ["TIMEFRAME"] = TIMEFRAME
+    os.environ["ENGINE"] = engine
+    source = InMemorySource(tables, synthetic.generate_configs(TIMEFRAME))
+
+    return Loader(source=source, target=InMemoryTarget())
+
+
+def stage_metrics(tables, engine: str, factor: str, memory: bool) -> List[Dict]:
+    """Metrics of every stage of a single factor on the base table."""
+    loader = build_loader(tables, engine)
+    rows = tables[f"{TIMEFRAME}_base"]
+    window = (rows[0][0], rows[-1][0])
+    config = next(c for c in loader.configs if c.factor == factor)
+    mkt_cap_ranges = loader._mkt_cap_ranges
+    selection_amounts = loader._selection_amounts
+
+    history = loader.build_history(window, config)
+    dates = sorted(history.keys())
+
+    def sort_factor(f):
+        if engine == "numpy":
+            return [
+                columnar.bucket_factor(f, history[d], mkt_cap_ranges) for d in dates
+            ]
+        return [compute.sort_factor(f, history[d], mkt_cap_ranges) for d in dates]
+
+    def get_top_flop(sorted_factors):
+        if engine == "numpy":
+            return [
+                columnar.get_top_flop(factor, history[d], s, selection_amounts)
+                for d, s in zip(dates, sorted_factors)
+            ]
+        return [compute.get_top_flop(s, selection_amounts) for s in sorted_factors]
+
+    def get_benchmark_rtn(sorted_factors):
+        if engine == "numpy":
+            return [
+                columnar.get_benchmark_rtn(history[d], s)
+                for d, s in zip(dates, sorted_factors)
+            ]
+        return [compute.get_benchmark_rtn(s) for s in sorted_factors]
+
+    def compute_returns(returns_dicts):
+        if engine == "numpy":
+            return [
+                columnar.compute_returns(d, config, r)
+                for d, r in zip(dates, returns_dicts)
+            ]
+        return [
+            compute.compute_returns(d, config, r) for d, r in zip(dates, returns_dicts)
+        ]
+
+    sorted_factor = sort_factor(factor)
+    sorted_benchmark = sort_factor("benchmark")
+    returns_dicts = get_top_flop(sorted_factor)
+    portfolios = [
+        (d, factor.upper(), "DAILY", c.upper(), n, 0.01, -0.01, 0.0, True, p["gvkeys"])
+        for d, returns_dict in zip(dates, returns_dicts)
+        for c, portfolio_dict in returns_dict.items()
+        for n, p in portfolio_dict.items()
+    ]
+
+    return [
+        measure(
+            "build_history",
+            lambda: loader.build_history(window, config),
+            len(rows),
+            memory,
+        ),
+        measure("sort_factor", lambda: sort_factor(factor), len(rows), memory),
+        measure("get_top_flop", lambda: get_top_flop(sorted_factor), len(rows), memory),
+        measure(
+            "get_benchmark_rtn",
+            lambda: get_benchmark_rtn(sorted_benchmark),
+            len(rows),
+            memory,
+        ),
+        measure(
+            "compute_returns",
+            lambda: compute_returns(returns_dicts),
+            len(portfolios),
+            memory,
+        ),
+        measure(
+            "FactorReturns.build_record",
+            lambda: [model.FactorReturns.build_record(p) for p in portfolios],
+            len(portfolios),
+            memory,
+        ),
+    ]
+
+
+def end_to_end_metrics(tables, engine: str, memory: bool) -> Dict:
+    """Metrics of a full run on the in-memory source and target."""
+    rows = sum(len(r) for r in tables.values())
+
+    return measure(
+        "end_to_end", lambda: build_loader(tables, engine).run(), rows, memory
+    )
+
+
+def git_revision() -> str:
+    """Current commit, if the suite runs from a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, check=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks")
+    parser.add_argument("--gvkeys", type=int, default=3000)
+    parser.add_argument("--dates", type=int, default=20)
+    parser.add_argument("--null-ratio", type=float, default=0.1)
+    parser.add_argument("--mkt-cap-median", type=float, default=1500.0)
+    parser.add_argument("--mkt-cap-sigma", type=float, default=1.5)
+    parser.add_argument("--engine", choices=["object", "numpy"], default="object")
+    parser.add_argument("--factor", default="bar")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--output", help="JSON file, defaults to stdout.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    tables = synthetic.generate_tables(
+        TIMEFRAME,
+        synthetic.generate_dates(args.dates),
+        n_gvkeys=args.gvkeys,
+        null_ratio=args.null_ratio,
+        mkt_cap_median=args.mkt_cap_median,
+        mkt_cap_sigma=args.mkt_cap_sigma,
+        seed=args.seed,
+    )
+    memory = not args.no_memory
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "params": vars(args),
+        "stages": stage_metrics(tables, args.engine, args.factor, memory)
+        + [end_to_end_metrics(tables, args.engine, memory)],
+    }
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Memory and build time of the source record models.
+
+Compares the ``__slots__`` record models and the columnar cross-section with
+the previous ``__dict__`` based ``BaseData`` model, on synthetic
+``daily_base`` rows.
+
+Usage:
+    PYTHONPATH=src python -m benchmarks.models --rows 200000
+"""
+
+import argparse
+from datetime import datetime
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from benchmarks import synthetic
+from factor_loader import columnar
+import factor_loader.model as model
+
+
+class DictBaseData:
+    """Previous ``BaseData`` model, with a per-instance ``__dict__``."""
+
+    @classmethod
+    def build_record(cls, record):
+        res = cls()
+
+        res.datadate = record[0]
+        res.gvkey = record[1]
+        res.utilization_pct = record[2]
+        res.bar = record[3]
+        res.age = record[4]
+        res.tickets = record[5]
+        res.units = record[6]
+        res.market_value_usd = record[7]
+        res.loan_rate_avg = record[8]
+        res.loan_rate_max = record[9]
+        res.loan_rate_min = record[10]
+        res.loan_rate_range = record[11]
+        res.loan_rate_stdev = record[12]
+        res.market_cap = record[13]
+        res.shares_out = record[14]
+        res.volume = record[15]
+        res.rtn = record[16]
+        res.winsorized_5_rtn = record[17]
+
+        return res
+
+
+def measure(build: Callable, rows: List[Tuple]) -> Tuple[float, float]:
+    """Bytes allocated per row and build time of a representation."""
+    tracemalloc.start()
+    built = build(rows)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+
+    start = time.perf_counter()
+    built = build(rows)
+    elapsed = time.perf_counter() - start
+    del built
+
+    return allocated / len(rows), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rows = synthetic.generate_rows("base", [datetime(2023, 1, 3)], n_gvkeys=args.rows)
+    factors = ["bar", "utilization_pct", "loan_rate_avg", "loan_rate_range"]
+    candidates = {
+        "dict BaseData": lambda r: [DictBaseData.build_record(x) for x in r],
+        "slots BaseData": model.BaseData.build_records,
+        "columnar CrossSection": lambda r: columnar.CrossSection.from_rows(
+            r, model.BaseData.COLUMNS, factors
+        ),
+    }
+
+    print(f"{'model':<24}{'bytes/row':>12}{'build (s)':>12}{'rows/s':>14}")
+    for name, build in candidates.items():
+        bytes_per_row, elapsed = measure(build, rows)
+        print(
+            f"{name:<24}{bytes_per_row:>12.1f}{elapsed:>12.3f}"
+            f"{len(rows) / elapsed:>14.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Precision of the float numeric mode against the Decimal path.
+
+Runs every config of a year through the object engine twice, once on
+``Decimal`` rows and once on the same rows as float64 (what ``NUMERIC=float``
+reads), and compares the returns as stored in ``DECIMAL(25,15)`` columns.
+The numpy engine is also run on the ``Decimal`` rows and checked against the
+object engine within ``columnar.TOLERANCE``, exiting with status 1 otherwise.
+
+The figures below are from synthetic rows only, they have not been measured on
+the production tables. On a synthetic year (252 dates, 3000 gvkeys, inputs
+with 8 decimals) the float path runs end to end in 20-22s instead of 30-35s.
+Every basket selects the same gvkeys, and 1 of the 23,436 rows stores a
+long/short/rtn value that differs, by 1e-15: a single unit of the last stored
+digit, from double rounding. Real inputs carry the scale of their NUMERIC
+columns and may round differently: run the comparison on a year of the source
+database, read twice as ``Decimal`` and as float, before relying on it. The
+report names the data it was computed on.
+
+Usage:
+    PYTHONPATH=src python -m benchmarks.precision --gvkeys 3000 --dates 252
+    PYTHONPATH=src python -m benchmarks.precision --source "$SOURCE" --year 2022
+"""
+
+import argparse
+from datetime import datetime
+from decimal import Decimal
+import json
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks import synthetic
+from benchmarks.stubs import InMemorySource, InMemoryTarget
+from factor_loader import columnar
+from factor_loader.loader import Loader
+from factor_loader.persistence import Source
+
+TIMEFRAME = "daily"
+
+# SCALE OF THE DECIMAL(25,15) COLUMNS OF FACTOR_RETURNS.
+STORED = Decimal("1e-15")
+
+
+class CapturingTarget(InMemoryTarget):
+    """Target keeping the returns records."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: List[Tuple] = []
+
+    def execute(self, query: str, records: List[Tuple]) -> None:
+        super().execute(query, records)
+        if query.startswith("INSERT INTO factor_returns "):
+            self.records.extend(records)
+
+
+def as_float(tables: Dict[str, List[Tuple]]) -> Dict[str, List[Tuple]]:
+    """Rows with Decimal values as float, like the float typecaster."""
+    return {
+        name: [
+            tuple(float(v) if isinstance(v, Decimal) else v for v in row)
+            for row in rows
+        ]
+        for name, rows in tables.items()
+    }
+
+
+def fetch_tables(
+    connection_string: str, year: int, numeric: str
+) -> Tuple[Dict[str, List[Tuple]], List[Tuple]]:
+    """Rows of a year of every source table, with the configs."""
+    source = Source(connection_string, numeric=numeric)
+    date_range = (datetime(year, 1, 1), datetime(year, 12, 31))
+    tables = {
+        f"{TIMEFRAME}_{t}": source.get_records(TIMEFRAME, t, date_range) or []
+        for t in synthetic.SOURCE_COLUMNS
+    }
+    configs = source.fetch_configs()
+    source.disconnect()
+
+    return tables, configs
+
+
+def run(tables, configs, engine: str = "object") -> Tuple[Dict[Tuple, Tuple], float]:
+    """Returns records keyed by primary key, with the elapsed time."""
+    os.environ["TIMEFRAME"] = TIMEFRAME
+    os.environ["ENGINE"] = engine
+    target = CapturingTarget()
+    loader = Loader(source=InMemorySource(tables, configs), target=target)
+
+    start = time.perf_counter()
+    loader.run()
+    elapsed = time.perf_counter() - start
+
+    return {r[:5]: r for r in target.records}, elapsed
+
+
+def stored(value) -> Optional[Decimal]:
+    """Value as stored in a DECIMAL(25,15) column."""
+    return None if value is None else Decimal(str(value)).quantize(STORED)
+
+
+def compare(decimal_records: Dict, float_records: Dict) -> Dict:
+    """Differences of the float records once stored."""
+    max_diff = Decimal(0)
+    rows_diff = 0
+    nulls_diff = 0
+    gvkeys_diff = 0
+    for key, d in decimal_records.items():
+        f = float_records[key]
+        if d[9:] != f[9:]:
+            gvkeys_diff += 1
+        row_differs = False
+        for i in (5, 6, 7):
+            a, b = stored(d[i]), stored(f[i])
+            if a is None or b is None:
+                if a is not b:
+                    nulls_diff += 1
+                    row_differs = True
+                continue
+            diff = abs(a - b)
+            max_diff = max(max_diff, diff)
+            row_differs |= diff > 0
+        rows_diff += row_differs
+
+    return {
+        "rows": len(decimal_records),
+        "rows_with_stored_difference": rows_diff,
+        "max_abs_stored_difference": float(max_diff),
+        "null_mismatches": nulls_diff,
+        "gvkeys_mismatches": gvkeys_diff,
+    }
+
+
+def compare_engines(object_records: Dict, numpy_records: Dict) -> Dict:
+    """Differences of the numpy engine records, before storage."""
+    max_diff = 0.0
+    nulls_diff = 0
+    gvkeys_diff = 0
+    for key, o in object_records.items():
+        n = numpy_records[key]
+        if o[9:] != n[9:]:
+            gvkeys_diff += 1
+        for i in (5, 6, 7):
+            if o[i] is None or n[i] is None:
+                nulls_diff += o[i] is not n[i]
+                continue
+            max_diff = max(max_diff, abs(float(o[i]) - float(n[i])))
+
+    return {
+        "numpy_max_abs_difference": max_diff,
+        "numpy_null_mismatches": nulls_diff,
+        "numpy_gvkeys_mismatches": gvkeys_diff,
+        "numpy_within_tolerance": max_diff <= columnar.TOLERANCE
+        and not nulls_diff
+        and not gvkeys_diff
+        and object_records.keys() == numpy_records.keys(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gvkeys", type=int, default=3000)
+    parser.add_argument("--dates", type=int, default=252)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--source", help="source database, instead of synthetic rows")
+    parser.add_argument("--year", type=int, default=2022)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.source:
+        data = f"source {TIMEFRAME} {args.year}"
+        decimal_tables, configs = fetch_tables(args.source, args.year, "decimal")
+        float_tables, _ = fetch_tables(args.source, args.year, "float")
+        configs = [(c[0], c[1], None, c[3]) for c in configs]
+    else:
+        data = f"synthetic {args.dates} dates x {args.gvkeys} gvkeys"
+        dates = synthetic.generate_dates(args.dates)
+        decimal_tables = synthetic.generate_tables(
+            TIMEFRAME, dates, n_gvkeys=args.gvkeys, seed=args.seed
+        )
+        float_tables = as_float(decimal_tables)
+        configs = synthetic.generate_configs(TIMEFRAME)
+
+    decimal_records, decimal_seconds = run(decimal_tables, configs)
+    float_records, float_seconds = run(float_tables, configs)
+
+    numpy_records, numpy_seconds = run(decimal_tables, configs, engine="numpy")
+
+    report = {"data": data}
+    report.update(compare(decimal_records, float_records))
+    report.update(compare_engines(decimal_records, numpy_records))
+    report["decimal_seconds"] = decimal_seconds
+    report["float_seconds"] = float_seconds
+    report["numpy_seconds"] = numpy_seconds
+    print(json.dumps(report, indent=2))
+    if not report["numpy_within_tolerance"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Agreement of the SQL engine with the object engine, on Postgres.
+
+Loads synthetic source tables into a scratch schema of the given database,
+runs every config through ``ENGINE=object`` and ``ENGINE=sql`` with quantile
+portfolios and the rank IC enabled, and compares what each run stores.
+
+Factor values are rounded to ``--factor-decimals`` decimals, one by default,
+so tied values fall at the basket boundaries and every engine must break them
+by gvkey. Returns, quantile returns and gvkey lists must be identical as
+stored, ``Decimal`` for ``Decimal`` and gvkey for gvkey, in order. The rank
+IC, computed in float64 by both, must agree within ``columnar.TOLERANCE``.
+Exits with status 1 on any difference. The scratch schema is dropped at the
+end.
+
+Usage:
+    PYTHONPATH=src python -m benchmarks.sql_engine --database "$TARGET"
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Dict, List, Tuple
+
+import psycopg2
+from psycopg2.extensions import make_dsn
+from psycopg2.extras import execute_values
+
+from benchmarks import synthetic
+from factor_loader import columnar
+from factor_loader.loader import Loader
+
+TIMEFRAME = "daily"
+
+DB_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "db")
+
+# COLUMNS OF THE STORED TABLES, PRIMARY KEY FIRST.
+TABLES = {
+    "factor_returns": (
+        5,
+        "datadate, factor, timeframe, mkt_cap_class, top, long_rtn, short_rtn, "
+        "rtn, consistent, long_gvkeys, short_gvkeys",
+    ),
+    "factor_quantile_returns": (
+        5,
+        "datadate, factor, timeframe, mkt_cap_class, quantiles, quantile_rtns, "
+        "quantile_sizes, spread_rtn, consistent",
+    ),
+    "factor_ic": (4, "datadate, factor, timeframe, mkt_cap_class, ic, n_gvkeys"),
+}
+
+
+def create_schema(database: str, schema: str, tables: Dict[str, List[Tuple]]):
+    """Creates the target tables and the source tables in a scratch schema."""
+    connection = psycopg2.connect(database)
+    cursor = connection.cursor()
+    cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema};")
+    cursor.execute(f"SET search_path TO {schema};")
+    for file in sorted(os.listdir(DB_DIR)):
+        if file.endswith(".sql"):
+            with open(os.path.join(DB_DIR, file)) as f:
+                cursor.execute(f.read())
+
+    for name, rows in tables.items():
+        columns = synthetic.SOURCE_COLUMNS[name.split("_", 1)[1]]
+        types = {"datadate": "TIMESTAMP", "gvkey": "INTEGER"}
+        ddl = ", ".join(f"{c} {types.get(c, 'NUMERIC')}" for c in columns)
+        cursor.execute(f"CREATE TABLE {name} ({ddl});")
+        execute_values(cursor, f"INSERT INTO {name} VALUES %s", rows)
+    execute_values(
+        cursor,
+        "INSERT INTO factor_loader_config VALUES %s",
+        synthetic.generate_configs(TIMEFRAME),
+    )
+    connection.commit()
+    connection.close()
+
+
+def drop_schema(database: str, schema: str) -> None:
+    """Drops the scratch schema."""
+    connection = psycopg2.connect(database)
+    connection.cursor().execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE;")
+    connection.commit()
+    connection.close()
+
+
+def run(dsn: str, engine: str) -> Dict[str, Dict[Tuple, Tuple]]:
+    """Stored rows of every table after a run from scratch, by primary key."""
+    connection = psycopg2.connect(dsn)
+    cursor = connection.cursor()
+    cursor.execute(f"TRUNCATE {', '.join(TABLES)};")
+    cursor.execute("UPDATE factor_loader_config SET last_date_persisted = NULL;")
+    connection.commit()
+
+    os.environ.update(
+        SOURCE=dsn,
+        TARGET=dsn,
+        TIMEFRAME=TIMEFRAME,
+        ENGINE=engine,
+        QUANTILES="5,10",
+        IC="true",
+    )
+    loader = Loader()
+    try:
+        loader.run()
+    finally:
+        loader.disconnect()
+
+    res = {}
+    for table, (key, columns) in TABLES.items():
+        cursor.execute(f"SELECT {columns} FROM {table};")
+        res[table] = {r[:key]: r for r in cursor.fetchall()}
+    connection.close()
+
+    return res
+
+
+def compare(object_rows: Dict, sql_rows: Dict) -> Dict:
+    """Differences of the SQL engine rows, per table."""
+    report = {}
+    for table, rows in object_rows.items():
+        mismatches = len(rows.keys() ^ sql_rows[table].keys())
+        for key in rows.keys() & sql_rows[table].keys():
+            o, s = rows[key], sql_rows[table][key]
+            if table == "factor_ic":
+                same = o[5] == s[5] and (
+                    o[4] == s[4]
+                    or None not in (o[4], s[4])
+                    and abs(o[4] - s[4]) <= columnar.TOLERANCE
+                )
+            else:
+                same = o == s
+            mismatches += not same
+        report[table] = {"rows": len(rows), "mismatches": mismatches}
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database", required=True, help="Postgres DSN or URI.")
+    parser.add_argument("--schema", default="factor_loader_sql_check")
+    parser.add_argument("--gvkeys", type=int, default=500)
+    parser.add_argument("--dates", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--factor-decimals", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    dates = synthetic.generate_dates(args.dates)
+    tables = synthetic.generate_tables(
+        TIMEFRAME,
+        dates,
+        n_gvkeys=args.gvkeys,
+        seed=args.seed,
+        factor_decimals=args.factor_decimals,
+    )
+    create_schema(args.database, args.schema, tables)
+    dsn = make_dsn(args.database, options=f"-c search_path={args.schema}")
+    try:
+        object_rows = run(dsn, "object")
+        sql_rows = run(dsn, "sql")
+    finally:
+        drop_schema(args.database, args.schema)
+
+    report = compare(object_rows, sql_rows)
+    print(json.dumps(report, indent=2))
+    if any(r["mismatches"] or not r["rows"] for r in report.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
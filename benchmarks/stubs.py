@@ -0,0 +1,112 @@
+"""In-memory stand-ins for Source and Target."""
+
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from benchmarks.synthetic import SOURCE_COLUMNS
+
+
+class InMemorySource:
+    """Source serving rows held in memory."""
+
+    def __init__(self, tables: Dict[str, List[Tuple]], configs: List[Tuple]) -> None:
+        self._tables = {
+            name: sorted(rows, key=itemgetter(0, 1)) for name, rows in tables.items()
+        }
+        self._configs = configs
+
+    def project(self, source_table, rows, columns: Optional[Sequence[str]] = None):
+        """Keeps the given columns of the rows, in order."""
+        if not columns:
+            return rows
+        getter = itemgetter(*(SOURCE_COLUMNS[source_table].index(c) for c in columns))
+        return (getter(r) for r in rows)
+
+    def disconnect(self) -> None:
+        """Nothing to disconnect from."""
+
+    def fetch_configs(self):
+        """Fetches every run configuration."""
+        return self._configs
+
+    def fetch_date_counts(
+        self, timeframe, source_table, after: Optional[datetime] = None
+    ) -> List[Tuple[datetime, int]]:
+        """Fetches the distinct dates of a source table with their row count."""
+        rows = self._tables[f"{timeframe}_{source_table}"]
+        return [
+            (d, sum(1 for _ in g))
+            for d, g in groupby(rows, key=itemgetter(0))
+            if after is None or d > after
+        ]
+
+    def get_records(
+        self,
+        timeframe,
+        source_table,
+        date_range,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Tuple]:
+        """Fetch records within the date range, ordered by date and gvkey."""
+        rows = self._tables[f"{timeframe}_{source_table}"]
+        res = [r for r in rows if date_range[0] <= r[0] <= date_range[1]]
+        res = list(self.project(source_table, res, columns))
+
+        return res if res else None
+
+    def stream_records(
+        self,
+        timeframe,
+        source_table,
+        date_range,
+        itersize: int = 10_000,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Iterator[Tuple]:
+        """Stream records within the date range, ordered by date and gvkey."""
+        rows = self._tables[f"{timeframe}_{source_table}"]
+        rows = (r for r in rows if date_range[0] <= r[0] <= date_range[1])
+        return self.project(source_table, rows, columns)
+
+
+class InMemoryTarget:
+    """Target counting what would be persisted."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.commits = 0
+        self._checkpoints: Dict[Tuple[str, str], datetime] = {}
+
+    def disconnect(self) -> None:
+        """Nothing to disconnect from."""
+
+    def commit_transaction(self) -> None:
+        """Commits a transaction."""
+        self.commits += 1
+
+    def retry(self, fn):
+        """Runs fn, there are no connection errors to retry on."""
+        return fn()
+
+    def fetch_checkpoints(self, timeframe: str) -> Dict[str, datetime]:
+        """Fetches the last persisted date of every config of a timeframe."""
+        return {
+            factor.lower(): d
+            for (factor, t), d in self._checkpoints.items()
+            if t == timeframe.upper()
+        }
+
+    def execute(self, query: str, records: List[Tuple]) -> None:
+        """Counts returns records and keeps config checkpoints."""
+        if query.startswith("INSERT INTO factor_loader_config"):
+            for factor, timeframe, last_date, _ in records:
+                self._checkpoints[(factor, timeframe)] = last_date
+        else:
+            self.rows += len(records)
+
+    def copy_upsert(
+        self, stage_query: str, copy_query: str, merge_query: str, records: List[Tuple]
+    ) -> None:
+        """Counts returns records."""
+        self.rows += len(records)
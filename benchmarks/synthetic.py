@@ -0,0 +1,140 @@
+"""Synthetic source cross-sections."""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+import math
+import random
+from typing import Dict, List, Tuple
+
+import factor_loader.model as model
+
+SOURCE_COLUMNS = {
+    "base": model.BaseData.COLUMNS,
+    "metrics": model.MetricsData.COLUMNS,
+}
+
+# MIRRORS THE SOURCE TABLES OF loader_config.LoaderConfig.
+FACTORS = {
+    "base": [
+        "benchmark",
+        "bar",
+        "utilization_pct",
+        "loan_rate_avg",
+        "loan_rate_range",
+    ],
+    "metrics": [
+        "bar_delta",
+        "utilization_pct_delta",
+        "loan_rate_avg_delta",
+        "loan_rate_range_delta",
+        "short_interest",
+        "short_ratio",
+    ],
+}
+
+
+def generate_dates(n_dates: int, start: datetime = datetime(2023, 1, 2)):
+    """Consecutive weekdays, starting at the given date."""
+    dates = []
+    date = start
+    while len(dates) < n_dates:
+        if date.weekday() < 5:
+            dates.append(date)
+        date += timedelta(days=1)
+
+    return dates
+
+
+def generate_rows(
+    source_table: str,
+    dates: List[datetime],
+    n_gvkeys: int = 3000,
+    null_ratio: float = 0.1,
+    mkt_cap_median: float = 1500.0,
+    mkt_cap_sigma: float = 1.5,
+    seed: int = 0,
+    factor_decimals: int = 8,
+) -> List[Tuple]:
+    """Rows of a ``{timeframe}_{source_table}`` table, as psycopg2 returns them.
+
+    Market caps (in millions) are log-normal around the median, so every cap
+    bucket gets a realistic share of the universe. Factor columns are NULL
+    with the given probability.
+
+    Args:
+        source_table: "base" or "metrics".
+        dates: dates of the cross-sections.
+        n_gvkeys: companies per cross-section.
+        null_ratio: probability of a NULL factor value.
+        mkt_cap_median: median market cap.
+        mkt_cap_sigma: log-normal dispersion of the market caps.
+        seed: random seed.
+        factor_decimals: decimals of the factor values, few decimals give
+            tied values.
+
+    Returns:
+        List of rows, ordered by date.
+    """
+    rnd = random.Random(seed)
+    columns = SOURCE_COLUMNS[source_table]
+    mkt_caps = [
+        rnd.lognormvariate(math.log(mkt_cap_median), mkt_cap_sigma)
+        for _ in range(n_gvkeys)
+    ]
+
+    rows = []
+    for date in dates:
+        for i, mkt_cap in enumerate(mkt_caps):
+            row = []
+            for column in columns:
+                if column == "datadate":
+                    row.append(date)
+                elif column == "gvkey":
+                    row.append(100_000 + i)
+                elif column == "market_cap":
+                    row.append(Decimal(f"{mkt_cap * rnd.uniform(0.97, 1.03):.6f}"))
+                elif column in ("rtn", "winsorized_5_rtn"):
+                    rtn = max(min(rnd.gauss(0, 0.03), 0.25), -0.25)
+                    row.append(Decimal(f"{rtn:.8f}"))
+                elif rnd.random() < null_ratio:
+                    row.append(None)
+                else:
+                    row.append(Decimal(f"{rnd.gauss(0, 1):.{factor_decimals}f}"))
+            rows.append(tuple(row))
+
+    return rows
+
+
+def generate_tables(
+    timeframe: str,
+    dates: List[datetime],
+    n_gvkeys: int = 3000,
+    null_ratio: float = 0.1,
+    mkt_cap_median: float = 1500.0,
+    mkt_cap_sigma: float = 1.5,
+    seed: int = 0,
+    factor_decimals: int = 8,
+) -> Dict[str, List[Tuple]]:
+    """Rows of every source table of a timeframe, keyed by table name."""
+    return {
+        f"{timeframe}_{source_table}": generate_rows(
+            source_table,
+            dates,
+            n_gvkeys=n_gvkeys,
+            null_ratio=null_ratio,
+            mkt_cap_median=mkt_cap_median,
+            mkt_cap_sigma=mkt_cap_sigma,
+            seed=seed + i,
+            factor_decimals=factor_decimals,
+        )
+        for i, source_table in enumerate(SOURCE_COLUMNS)
+    }
+
+
+def generate_configs(timeframe: str) -> List[Tuple]:
+    """Rows of ``factor_loader_config`` for a timeframe, without checkpoints."""
+    return [
+        (factor.upper(), timeframe.upper(), None, source_table.upper())
+        for source_table in sorted(FACTORS)
+        for factor in sorted(FACTORS[source_table])
+    ]
@@ -0,0 +1,15 @@
+CREATE TABLE factor_ic
+(
+    datadate            TIMESTAMP,
+    factor              VARCHAR(100),
+    timeframe           VARCHAR(20),
+    mkt_cap_class       VARCHAR(20),
+
+    ic                  DECIMAL(25,15),
+    n_gvkeys            INTEGER,
+
+    PRIMARY KEY (datadate, factor, timeframe, mkt_cap_class)
+);
+
+-- IC IS THE SPEARMAN RANK CORRELATION BETWEEN THE FACTOR AND WINSORIZED_5_RTN
+-- OVER THE N_GVKEYS ROWS OF THE BUCKET, NULL IF EITHER SIDE IS CONSTANT.
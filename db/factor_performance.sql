@@ -0,0 +1,57 @@
+CREATE TABLE factor_performance
+(
+    factor              VARCHAR(100),
+    timeframe           VARCHAR(20),
+    mkt_cap_class       VARCHAR(20),
+    top                 INTEGER,
+
+    first_date          TIMESTAMP,
+    last_date           TIMESTAMP,
+    n_periods           INTEGER,
+
+    sum_rtn             DOUBLE PRECISION,
+    sum_sq_rtn          DOUBLE PRECISION,
+    wealth              DOUBLE PRECISION,
+    peak_wealth         DOUBLE PRECISION,
+    drawdown            DOUBLE PRECISION,
+    max_drawdown        DOUBLE PRECISION,
+    window_rtns         DOUBLE PRECISION[],
+
+    PRIMARY KEY (factor, timeframe, mkt_cap_class, top)
+);
+
+-- RUNNING STATE OF THE RTN SERIES OF FACTOR_RETURNS, NULL RETURNS SKIPPED,
+-- FOLDED IN BY THE LOADER UP TO LAST_DATE. WEALTH IS THE GROWTH OF 1 AND
+-- DRAWDOWN IS 1 - WEALTH / PEAK_WEALTH. WINDOW_RTNS HOLDS THE LAST RETURNS,
+-- OLDEST FIRST. DOUBLE PRECISION, THE STATE IS FOLDED IN FLOAT BY THE LOADER.
+CREATE VIEW factor_performance_stats AS
+SELECT
+    factor,
+    timeframe,
+    mkt_cap_class,
+    top,
+    first_date,
+    last_date,
+    n_periods,
+    wealth - 1 AS cum_rtn,
+    sum_rtn / n_periods AS mean_rtn,
+    vol,
+    (SELECT stddev_samp(r) FROM unnest(window_rtns) AS r) AS rolling_vol,
+    sum_rtn / n_periods / NULLIF(vol, 0) * sqrt(periods_per_year) AS sharpe,
+    drawdown,
+    max_drawdown
+FROM (
+    SELECT
+        *,
+        sqrt(
+            GREATEST(sum_sq_rtn - sum_rtn * sum_rtn / n_periods, 0)
+            / NULLIF(n_periods - 1, 0)
+        ) AS vol,
+        CASE timeframe
+            WHEN 'DAILY' THEN 252
+            WHEN 'WEEKLY' THEN 52
+            WHEN 'MONTHLY' THEN 12
+        END AS periods_per_year
+    FROM factor_performance
+    WHERE n_periods > 0
+) AS performance;
@@ -0,0 +1,21 @@
+CREATE TABLE factor_quantile_returns
+(
+    datadate            TIMESTAMP,
+    factor              VARCHAR(100),
+    timeframe           VARCHAR(20),
+    mkt_cap_class       VARCHAR(20),
+    quantiles           INTEGER,
+
+    quantile_rtns       DECIMAL(25,15)[],
+    quantile_sizes      INTEGER[],
+    spread_rtn          DECIMAL(25,15),
+
+    consistent          BOOLEAN,
+
+    PRIMARY KEY (datadate, factor, timeframe, mkt_cap_class, quantiles)
+);
+
+-- QUANTILE_RTNS[K] IS THE MEAN RETURN OF THE K-TH QUANTILE, IN ASCENDING ORDER
+-- OF THE FACTOR, NULL IF EMPTY. SPREAD_RTN IS QUANTILE_RTNS[1] MINUS
+-- QUANTILE_RTNS[QUANTILES], THE LOWEST QUANTILE BEING THE LONG SIDE AS IN
+-- FACTOR_RETURNS. CONSISTENT IF NO QUANTILE IS EMPTY.
@@ -11,7 +11,27 @@ CREATE TABLE factor_returns
     rtn                 DECIMAL(25,15),
 
     consistent          BOOLEAN,
-    gvkeys              JSONB,
+    long_gvkeys         INTEGER[],
+    short_gvkeys        INTEGER[],
 
     PRIMARY KEY (datadate, factor, timeframe, mkt_cap_class, top)
-);
\ No newline at end of file
+);
+
+-- SHORT_GVKEYS IS NULL WHEN IDENTICAL TO LONG_GVKEYS (E.G. BENCHMARK ROWS).
+-- RESTORES THE ORIGINAL JSONB GVKEYS SHAPE: {"LONG": [...], "SHORT": [...]}.
+CREATE VIEW factor_returns_gvkeys AS
+SELECT
+    datadate,
+    factor,
+    timeframe,
+    mkt_cap_class,
+    top,
+    long_rtn,
+    short_rtn,
+    rtn,
+    consistent,
+    jsonb_build_object(
+        'LONG', to_jsonb(long_gvkeys),
+        'SHORT', to_jsonb(COALESCE(short_gvkeys, long_gvkeys))
+    ) AS gvkeys
+FROM factor_returns;
@@ -0,0 +1,41 @@
+-- MOVES THE JSONB GVKEYS OF FACTOR_RETURNS INTO INTEGER ARRAYS.
+-- SHORT_GVKEYS IS LEFT NULL WHEN IDENTICAL TO LONG_GVKEYS.
+-- RUN VACUUM FULL factor_returns AFTERWARDS TO RECLAIM THE SPACE.
+ALTER TABLE factor_returns
+    ADD COLUMN long_gvkeys  INTEGER[],
+    ADD COLUMN short_gvkeys INTEGER[];
+
+UPDATE factor_returns
+SET
+    long_gvkeys = ARRAY(
+        SELECT e::INTEGER
+        FROM jsonb_array_elements_text(gvkeys -> 'LONG') WITH ORDINALITY AS t(e, i)
+        ORDER BY i
+    ),
+    short_gvkeys = CASE
+        WHEN gvkeys -> 'SHORT' = gvkeys -> 'LONG' THEN NULL
+        ELSE ARRAY(
+            SELECT e::INTEGER
+            FROM jsonb_array_elements_text(gvkeys -> 'SHORT') WITH ORDINALITY AS t(e, i)
+            ORDER BY i
+        )
+    END;
+
+ALTER TABLE factor_returns DROP COLUMN gvkeys;
+
+CREATE VIEW factor_returns_gvkeys AS
+SELECT
+    datadate,
+    factor,
+    timeframe,
+    mkt_cap_class,
+    top,
+    long_rtn,
+    short_rtn,
+    rtn,
+    consistent,
+    jsonb_build_object(
+        'LONG', to_jsonb(long_gvkeys),
+        'SHORT', to_jsonb(COALESCE(short_gvkeys, long_gvkeys))
+    ) AS gvkeys
+FROM factor_returns;
@@ -0,0 +1,399 @@
+"""Columnar (NumPy) engine for the factor computations.
+
+Each date's cross-section is held as column arrays instead of one
+``BaseData``/``MetricsData`` object per row. Market cap buckets are boolean
+masks and the top/flop baskets are picked with a partial selection, so only
+the selected extremes are ever sorted.
+
+The output mirrors ``compute.compute_returns``. Returns are computed in float64
+instead of ``Decimal``; both paths agree within an absolute tolerance of
+``1e-12``, well below the ``DECIMAL(25,15)`` precision of ``factor_returns``.
+Buckets are ordered by gvkey and ties in the factor keep that order, like the
+stable sort of the object path, so the selected gvkeys are identical.
+"""
+
+from datetime import datetime
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from factor_loader import compute
+from factor_loader.ic import rank_ic
+import factor_loader.model as model
+
+logger = logging.getLogger(__name__)
+
+TOLERANCE = 1e-12
+
+
+class CrossSection:
+    """Columnar cross-section of a single date."""
+
+    gvkey: np.ndarray
+    market_cap: np.ndarray
+    winsorized_5_rtn: np.ndarray
+    factors: Dict[str, np.ndarray]
+
+    def __init__(
+        self,
+        gvkey: np.ndarray,
+        market_cap: np.ndarray,
+        winsorized_5_rtn: np.ndarray,
+        factors: Optional[Dict[str, np.ndarray]] = None,
+    ) -> None:
+        self.gvkey = gvkey
+        self.market_cap = market_cap
+        self.winsorized_5_rtn = winsorized_5_rtn
+        self.factors = factors if factors else {}
+
+    def __len__(self) -> int:
+        return len(self.gvkey)
+
+    @classmethod
+    def from_rows(
+        cls, rows: List[Tuple], columns: Sequence[str], factors: Iterable[str]
+    ) -> "CrossSection":
+        """Builds a cross-section from raw source rows.
+
+        Args:
+            rows: raw rows of a single date.
+            columns: column names of the rows, in order.
+            factors: factor columns to keep.
+
+        Returns:
+            Cross-section holding the required columns.
+        """
+        index = {c: i for i, c in enumerate(columns)}
+        values = list(zip(*rows)) if rows else [()] * len(columns)
+
+        return cls(
+            gvkey=np.array(values[index["gvkey"]], dtype=np.int64),
+            market_cap=_floats(values[index["market_cap"]]),
+            winsorized_5_rtn=_floats(values[index["winsorized_5_rtn"]]),
+            factors={f: _floats(values[index[f]]) for f in factors},
+        )
+
+
+def _floats(values: Sequence) -> np.ndarray:
+    """Column of Decimal or float values as float64, None as nan."""
+    # ONE BY ONE THROUGH FROMITER, NP.ARRAY IS ABOUT 7X SLOWER ON DECIMALS.
+    return np.fromiter(
+        (np.nan if v is None else v for v in values), np.float64, count=len(values)
+    )
+
+
+def pack_history(history: Dict[datetime, CrossSection]) -> Dict:
+    """Packs a history into a few contiguous column buffers.
+
+    Cheap to pickle or share with worker processes, unlike one object per
+    row or one array set per date.
+    """
+    dates = sorted(history.keys())
+    sections = [history[d] for d in dates]
+    factors = sections[0].factors.keys() if sections else []
+
+    return {
+        "dates": dates,
+        "offsets": np.cumsum([0] + [len(s) for s in sections]),
+        "gvkey": np.concatenate([s.gvkey for s in sections]),
+        "market_cap": np.concatenate([s.market_cap for s in sections]),
+        "winsorized_5_rtn": np.concatenate([s.winsorized_5_rtn for s in sections]),
+        "factors": {
+            f: np.concatenate([s.factors[f] for s in sections]) for f in factors
+        },
+    }
+
+
+def unpack_history(packed_history: Dict) -> Dict[datetime, CrossSection]:
+    """Rebuilds a history from packed column buffers, without copies."""
+    offsets = packed_history["offsets"]
+
+    history = {}
+    for i, d in enumerate(packed_history["dates"]):
+        rows = slice(offsets[i], offsets[i + 1])
+        history[d] = CrossSection(
+            gvkey=packed_history["gvkey"][rows],
+            market_cap=packed_history["market_cap"][rows],
+            winsorized_5_rtn=packed_history["winsorized_5_rtn"][rows],
+            factors={f: v[rows] for f, v in packed_history["factors"].items()},
+        )
+
+    return history
+
+
+def _smallest(values: np.ndarray, n: int) -> np.ndarray:
+    """Positions of the n smallest values, in stable ascending order."""
+    size = len(values)
+    if n >= size:
+        return np.argsort(values, kind="stable")
+
+    kth = np.partition(values, n - 1)[n - 1]
+    below = np.flatnonzero(values < kth)
+    ties = np.flatnonzero(values == kth)[: n - len(below)]
+    selected = np.concatenate((below, ties))
+
+    return selected[np.argsort(values[selected], kind="stable")]
+
+
+def _largest(values: np.ndarray, n: int) -> np.ndarray:
+    """Positions of the n largest values, in stable ascending order."""
+    size = len(values)
+    if n >= size:
+        return np.argsort(values, kind="stable")
+
+    kth = np.partition(values, size - n)[size - n]
+    above = np.flatnonzero(values > kth)
+    ties = np.flatnonzero(values == kth)
+    ties = ties[len(ties) - (n - len(above)) :]
+    selected = np.concatenate((ties, above))
+
+    return selected[np.argsort(values[selected], kind="stable")]
+
+
+def _cumulative_sums(returns: np.ndarray) -> np.ndarray:
+    """Sums of the first 0, 1, ..., n returns."""
+    return np.concatenate(([0.0], np.cumsum(returns)))
+
+
+def partition_mkt_cap(
+    cross_section: CrossSection, mkt_cap_ranges: Dict[str, Tuple[int, int]]
+) -> Dict[str, np.ndarray]:
+    """Splits a cross-section into market cap classes.
+
+    Returns:
+        Dict with mkt cap class as key and row positions as value, ordered by
+        gvkey. Stable selections then break ties in the factor by gvkey.
+    """
+    by_gvkey = np.argsort(cross_section.gvkey, kind="stable")
+    market_cap = cross_section.market_cap[by_gvkey]
+
+    res = {}
+    for mkt_cap_class, (min_mkt_cap, max_mkt_cap) in mkt_cap_ranges.items():
+        mask = (min_mkt_cap < market_cap) & (market_cap <= max_mkt_cap)
+        res[mkt_cap_class] = by_gvkey[mask]
+
+    return res
+
+
+def bucket_factor(
+    factor: str,
+    cross_section: CrossSection,
+    mkt_cap_ranges: Dict[str, Tuple[int, int]],
+    partition: Optional[Dict[str, np.ndarray]] = None,
+) -> Dict[str, np.ndarray]:
+    """Columnar counterpart of ``compute.sort_factor``.
+
+    Rows are only filtered here, ordering is left to the selection step. A
+    precomputed market cap partition of the cross-section can be reused.
+
+    Returns:
+        Dict with mkt cap class as key and row positions as value.
+    """
+    if partition is None:
+        partition = partition_mkt_cap(cross_section, mkt_cap_ranges)
+    if factor == "benchmark":
+        return partition
+
+    values = cross_section.factors[factor]
+    return {
+        mkt_cap_class: positions[~np.isnan(values[positions])]
+        for mkt_cap_class, positions in partition.items()
+    }
+
+
+def get_top_flop(
+    factor: str,
+    cross_section: CrossSection,
+    bucketed_factor: Dict[str, np.ndarray],
+    selection_amounts: List[int],
+) -> Dict:
+    """Columnar counterpart of ``compute.get_top_flop``.
+
+    The largest basket is selected once per bucket, smaller baskets are its
+    prefixes (flop) and suffixes (top), whose sums are read from cumulative
+    sums of the returns from each end.
+    """
+    values = cross_section.factors[factor]
+    max_amount = max(selection_amounts)
+
+    res = {}
+    for mkt_cap_class, positions in bucketed_factor.items():
+        bucket_values = values[positions]
+        flop_all = positions[_smallest(bucket_values, max_amount)]
+        top_all = positions[_largest(bucket_values, max_amount)]
+        flop_sums = _cumulative_sums(cross_section.winsorized_5_rtn[flop_all])
+        top_sums = _cumulative_sums(cross_section.winsorized_5_rtn[top_all[::-1]])
+        flop_gvkeys = cross_section.gvkey[flop_all].tolist()
+        top_gvkeys = cross_section.gvkey[top_all].tolist()
+
+        res[mkt_cap_class] = {}
+        for selection_amount in selection_amounts:
+            n = min(selection_amount, len(flop_all))
+
+            res[mkt_cap_class][selection_amount] = {
+                "top_sum": top_sums[n],
+                "flop_sum": flop_sums[n],
+                "count": n,
+                "consistent": len(positions) >= selection_amount * 2,
+                "gvkeys": {
+                    "LONG": flop_gvkeys[:n],
+                    "SHORT": top_gvkeys[len(top_gvkeys) - n :],
+                },
+            }
+
+    return res
+
+
+def get_quantiles(
+    factor: str,
+    cross_section: CrossSection,
+    bucketed_factor: Dict[str, np.ndarray],
+    quantiles: List[int],
+) -> Dict:
+    """Columnar counterpart of ``compute.get_quantiles``.
+
+    Each bucket is ranked by a single stable argsort, every quantile sum is a
+    difference of the cumulative sums of the ranked returns.
+    """
+    values = cross_section.factors[factor]
+
+    res = {}
+    for mkt_cap_class, positions in bucketed_factor.items():
+        ranked = positions[np.argsort(values[positions], kind="stable")]
+        sums = _cumulative_sums(cross_section.winsorized_5_rtn[ranked])
+
+        res[mkt_cap_class] = {}
+        for q in quantiles:
+            bounds = np.array(compute.quantile_bounds(len(ranked), q))
+            res[mkt_cap_class][q] = {
+                "sums": np.diff(sums[bounds]).tolist(),
+                "sizes": np.diff(bounds).tolist(),
+            }
+
+    return res
+
+
+def get_benchmark_rtn(
+    cross_section: CrossSection, bucketed_factor: Dict[str, np.ndarray]
+) -> Dict:
+    """Columnar counterpart of ``compute.get_benchmark_rtn``."""
+    res = {}
+    for mkt_cap_class, positions in bucketed_factor.items():
+        keys = cross_section.gvkey[positions].tolist()
+        returns_sum = cross_section.winsorized_5_rtn[positions].sum()
+
+        res[mkt_cap_class] = {
+            0: {
+                "top_sum": returns_sum,
+                "flop_sum": returns_sum,
+                "count": len(positions),
+                "consistent": True,
+                "gvkeys": {"LONG": keys, "SHORT": keys},
+            }
+        }
+
+    return res
+
+
+def compute_returns(
+    next_date: datetime, config: model.Config, returns_dict: Dict
+) -> List[Tuple]:
+    """Columnar counterpart of ``compute.compute_returns``."""
+    res = []
+    for mkt_cap_class, selection_amount_dict in returns_dict.items():
+        for selection_amount, portfolio in selection_amount_dict.items():
+            count = portfolio["count"]
+
+            long_returns = float(portfolio["flop_sum"] / count) if count else None
+            short_returns = float(-portfolio["top_sum"] / count) if count else None
+
+            returns = (
+                (long_returns + short_returns) / 2
+                if short_returns and long_returns
+                else None
+            )
+            record = (
+                next_date,
+                config.factor.upper(),
+                config.timeframe.upper(),
+                mkt_cap_class.upper(),
+                selection_amount,
+                long_returns,
+                short_returns,
+                returns,
+                portfolio["consistent"],
+                portfolio["gvkeys"],
+            )
+
+            res.append(model.FactorReturns.build_record(record).as_tuple())
+
+    return res
+
+
+def compute_ic(
+    next_date: datetime,
+    config: model.Config,
+    cross_section: CrossSection,
+    bucketed_factor: Dict[str, np.ndarray],
+) -> List[Tuple]:
+    """Columnar counterpart of ``compute.compute_ic``."""
+    values = cross_section.factors[config.factor]
+
+    res = []
+    for mkt_cap_class, positions in bucketed_factor.items():
+        record = (
+            next_date,
+            config.factor.upper(),
+            config.timeframe.upper(),
+            mkt_cap_class.upper(),
+            rank_ic(values[positions], cross_section.winsorized_5_rtn[positions]),
+            len(positions),
+        )
+
+        res.append(model.FactorIC.build_record(record).as_tuple())
+
+    return res
+
+
+def run_date(
+    d: datetime,
+    cross_section: CrossSection,
+    config: model.Config,
+    mkt_cap_ranges: Dict[str, Tuple[int, int]],
+    selection_amounts: List[int],
+    partition: Optional[Dict[str, np.ndarray]] = None,
+    quantiles: Optional[List[int]] = None,
+    ic: bool = False,
+) -> Dict[str, List[Tuple]]:
+    """Runs a configuration on the cross-section of a single date.
+
+    Returns:
+        Records per target table.
+    """
+    logger.debug("Bucketing factor...")
+    bucketed_factor = bucket_factor(
+        config.factor, cross_section, mkt_cap_ranges, partition
+    )
+    logger.debug("Getting returns...")
+    if config.factor == "benchmark":
+        returns_dict = get_benchmark_rtn(cross_section, bucketed_factor)
+    else:
+        returns_dict = get_top_flop(
+            config.factor, cross_section, bucketed_factor, selection_amounts
+        )
+    logger.debug("Computing return...")
+    res = {"factor_returns": compute_returns(d, config, returns_dict)}
+    if quantiles and config.factor != "benchmark":
+        logger.debug("Computing quantile returns...")
+        quantiles_dict = get_quantiles(
+            config.factor, cross_section, bucketed_factor, quantiles
+        )
+        res["factor_quantile_returns"] = compute.compute_quantile_returns(
+            d, config, quantiles_dict
+        )
+    if ic and config.factor != "benchmark":
+        logger.debug("Computing rank IC...")
+        res["factor_ic"] = compute_ic(d, config, cross_section, bucketed_factor)
+
+    return res
@@ -1,6 +1,6 @@
 """Helper functions to deal with timeframes."""
-from datetime import datetime, timedelta
-from typing import List
+from datetime import datetime
+from typing import List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,24 +17,44 @@ def generate_quarters(years: List[int]):
     return intervals
 
 
-def generate_intervals(years: List[int]):
+def chunk_dates(
+    date_counts: List[Tuple[datetime, int]],
+    max_dates: Optional[int] = None,
+    max_rows: Optional[int] = None,
+) -> List[Tuple[datetime, datetime]]:
+    """Chunks consecutive dates into (first date, last date) intervals.
+
+    Args:
+        date_counts: distinct dates, ascending, with their number of rows.
+        max_dates: maximum number of dates per interval.
+        max_rows: maximum number of rows per interval. A single date above the
+            limit gets an interval of its own.
+
+    Returns:
+        List of intervals covering every date.
+    """
     intervals = []
-    for year in years:
-        first_day = datetime(year, 1, 1)
-        if first_day.weekday() == 0:
-            # first day monday, goes back to get last friday of the year
-            intervals = intervals + [
-                (first_day - timedelta(days=3), datetime(year, 12, 31))
-            ]
-        elif first_day.weekday() == 6:
-            # first day sunday, goes back to get last friday of the year
-            intervals = intervals + [
-                (first_day - timedelta(days=2), datetime(year, 12, 31))
-            ]
-        else:
-            # any other weekday has a weekday before
-            intervals = intervals + [
-                (first_day - timedelta(days=1), datetime(year, 12, 31))
-            ]
+    first_date = None
+    last_date = None
+    n_dates = 0
+    n_rows = 0
+    for date, count in date_counts:
+        if first_date is not None and (
+            (max_dates and n_dates + 1 > max_dates)
+            or (max_rows and n_rows + count > max_rows)
+        ):
+            intervals.append((first_date, last_date))
+            first_date = None
+            n_dates = 0
+            n_rows = 0
+
+        if first_date is None:
+            first_date = date
+        last_date = date
+        n_dates += 1
+        n_rows += count
+
+    if first_date is not None:
+        intervals.append((first_date, last_date))
 
     return intervals
@@ -0,0 +1,62 @@
+"""Rank information coefficient of a factor.
+
+The IC is the Spearman rank correlation between a factor and the returns of
+the same rows: the Pearson correlation of their ranks, tied values sharing
+the average of their ranks. Computed in float64 by every engine.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+def tie_ranks(breaks: np.ndarray) -> np.ndarray:
+    """Ranks from 1 of sorted values, tied values sharing their average rank.
+
+    Args:
+        breaks: whether each value but the first differs from the previous.
+    """
+    size = len(breaks) + 1
+
+    # RUNS OF EQUAL VALUES, EACH RANKED AT THE MIDDLE OF ITS POSITIONS.
+    starts = np.concatenate(([0], np.flatnonzero(breaks) + 1))
+    ends = np.append(starts[1:], size)
+
+    return np.repeat((starts + ends + 1) / 2, ends - starts)
+
+
+def average_ranks(values: np.ndarray) -> np.ndarray:
+    """Ranks of values from 1, tied values sharing their average rank."""
+    order = np.argsort(values, kind="stable")
+    sorted_values = values[order]
+
+    ranks = np.empty(len(values), dtype=np.float64)
+    ranks[order] = tie_ranks(sorted_values[1:] != sorted_values[:-1])
+
+    return ranks
+
+
+def rank_ic(factor: np.ndarray, returns: np.ndarray) -> Optional[float]:
+    """Spearman rank correlation of a factor and returns.
+
+    Returns:
+        Rank IC, None with fewer than two rows or if either side is constant.
+    """
+    if len(factor) < 2:
+        return None
+
+    return rank_correlation(average_ranks(factor), average_ranks(returns))
+
+
+def rank_correlation(
+    factor_ranks: np.ndarray, returns_ranks: np.ndarray
+) -> Optional[float]:
+    """Pearson correlation of ranks, None if either side is constant."""
+    factor_ranks = factor_ranks - factor_ranks.mean()
+    returns_ranks = returns_ranks - returns_ranks.mean()
+
+    scale = np.sqrt((factor_ranks @ factor_ranks) * (returns_ranks @ returns_ranks))
+    if scale == 0:
+        return None
+
+    return float(factor_ranks @ returns_ranks / scale)
@@ -0,0 +1,201 @@
+"""Per stage timing and throughput of the loader."""
+
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str, str, str, str]
+
+_FIELDS = ["seconds", "rows", "bytes", "calls"]
+
+
+class Measurement:
+    """Rows and bytes of a measured stage, set by the caller."""
+
+    __slots__ = ("rows", "bytes")
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.bytes = 0
+
+
+class Stats:
+    """Collects wall time, rows and bytes per stage, config and window.
+
+    When disabled every hook returns immediately, without reading the clock.
+    """
+
+    _sample_size = 100
+
+    def __init__(self, enabled: bool = False, metrics_file: Optional[str] = None):
+        self.enabled = enabled or bool(metrics_file)
+        self.metrics_file = metrics_file
+        self._lock = threading.Lock()
+        self._stats: Dict[Key, List[float]] = {}
+
+    @contextmanager
+    def measure(
+        self,
+        stage: str,
+        timeframe: str = "",
+        source_table: str = "",
+        factor: str = "",
+        window: Optional[Tuple[datetime, datetime]] = None,
+    ) -> Iterator[Measurement]:
+        """Measures the wall time of the enclosed block."""
+        measurement = Measurement()
+        if not self.enabled:
+            yield measurement
+            return
+
+        start = time.perf_counter()
+        try:
+            yield measurement
+        finally:
+            self.record(
+                (stage, timeframe, source_table, factor, self.label(window)),
+                time.perf_counter() - start,
+                measurement.rows,
+                measurement.bytes,
+            )
+
+    def iterate(
+        self,
+        iterable: Iterable,
+        stage: str,
+        timeframe: str = "",
+        source_table: str = "",
+        factor: str = "",
+        window: Optional[Tuple[datetime, datetime]] = None,
+    ) -> Iterable:
+        """Measures the time spent waiting on every item of an iterable."""
+        if not self.enabled:
+            return iterable
+
+        return self._iterate(
+            iterable, (stage, timeframe, source_table, factor, self.label(window))
+        )
+
+    def _iterate(self, iterable: Iterable, key: Key) -> Iterator:
+        iterator = iter(iterable)
+        seconds = 0.0
+        rows = 0
+        size = 0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    seconds += time.perf_counter() - start
+                    break
+                seconds += time.perf_counter() - start
+                rows += 1
+                if rows <= self._sample_size:
+                    size += self.sizeof(item)
+                yield item
+        finally:
+            if rows > self._sample_size:
+                size = size * rows // self._sample_size
+            self.record(key, seconds, rows, size)
+
+    def record(self, key: Key, seconds: float, rows: int, size: int) -> None:
+        """Adds a measurement to the totals of its key."""
+        with self._lock:
+            totals = self._stats.setdefault(key, [0.0, 0, 0, 0])
+            totals[0] += seconds
+            totals[1] += rows
+            totals[2] += size
+            totals[3] += 1
+
+    def estimate_bytes(self, records: Optional[List[Tuple]]) -> int:
+        """Estimates the in-memory size of records from a sample of them."""
+        if not self.enabled or not records:
+            return 0
+
+        sample = records[: self._sample_size]
+        return sum(self.sizeof(r) for r in sample) * len(records) // len(sample)
+
+    @staticmethod
+    def sizeof(record) -> int:
+        if isinstance(record, tuple):
+            return sys.getsizeof(record) + sum(sys.getsizeof(v) for v in record)
+        return sys.getsizeof(record)
+
+    @staticmethod
+    def label(window: Optional[Tuple[datetime, datetime]]) -> str:
+        if window is None:
+            return ""
+        return f"{window[0]:%Y-%m-%d}/{window[1]:%Y-%m-%d}"
+
+    def summary(self) -> List[Tuple[str, str, str, str, float, int, int, int]]:
+        """Totals per stage and config, over every window."""
+        totals: Dict[Tuple[str, str, str, str], List[float]] = {}
+        for (stage, timeframe, source_table, factor, _), values in self._stats.items():
+            row = totals.setdefault(
+                (stage, timeframe, source_table, factor), [0.0, 0, 0, 0]
+            )
+            for i, value in enumerate(values):
+                row[i] += value
+
+        return [k + tuple(v) for k, v in sorted(totals.items())]
+
+    def report(self) -> None:
+        """Logs the summary table and writes the metrics file, if any."""
+        if not self.enabled:
+            return
+
+        logger.info(
+            f"{'stage':<10}{'timeframe':<10}{'table':<10}{'factor':<24}"
+            f"{'seconds':>10}{'rows':>12}{'rows/s':>12}{'MB':>10}"
+        )
+        for stage, timeframe, source_table, factor, s, rows, size, _ in self.summary():
+            rate = rows / s if s else 0
+            logger.info(
+                f"{stage:<10}{timeframe:<10}{source_table:<10}{factor:<24}"
+                f"{s:>10.2f}{rows:>12}{rate:>12.0f}{size / 1e6:>10.1f}"
+            )
+
+        if self.metrics_file:
+            with open(self.metrics_file, "w") as f:
+                if self.metrics_file.endswith(".prom"):
+                    f.write(self.as_prometheus())
+                else:
+                    json.dump(self.as_dict(), f, indent=2)
+
+    def as_dict(self) -> Dict:
+        """Every measurement, per stage, config and window."""
+        return {
+            "stages": [
+                dict(
+                    zip(["stage", "timeframe", "source_table", "factor", "window"], k),
+                    **dict(zip(_FIELDS, v)),
+                )
+                for k, v in sorted(self._stats.items())
+            ]
+        }
+
+    def as_prometheus(self) -> str:
+        """Every measurement, in the Prometheus text exposition format."""
+        lines = []
+        for i, field in enumerate(_FIELDS):
+            name = f"factor_loader_stage_{field}"
+            lines.append(f"# TYPE {name} counter")
+            for (stage, timeframe, source_table, factor, window), values in sorted(
+                self._stats.items()
+            ):
+                labels = (
+                    f'stage="{stage}",timeframe="{timeframe}",'
+                    f'source_table="{source_table}",factor="{factor}",'
+                    f'window="{window}"'
+                )
+                lines.append(f"{name}{{{labels}}} {values[i]}")
+
+        return "\n".join(lines) + "\n"
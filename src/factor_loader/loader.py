@@ -0,0 +1,1101 @@
+"""Factor returns loader."""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import copy
+from datetime import datetime, timedelta
+import logging
+from itertools import groupby
+import multiprocessing
+from operator import itemgetter
+import os
+import queue
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from factor_loader import columnar, compute, performance, workers
+from factor_loader.date_helpers import chunk_dates
+from factor_loader.instrumentation import Stats
+import factor_loader.model as model
+import factor_loader.queries as queries
+from factor_loader.persistence import CachedSource, ConnectionPool, Source, Target
+
+logger = logging.getLogger(__name__)
+
+
+class Loader:
+    """Loader class for factor returns."""
+
+    _mkt_cap_ranges = compute.MKT_CAP_RANGES
+
+    _selection_amounts = compute.SELECTION_AMOUNTS
+
+    _timeframes = ["daily", "weekly", "monthly"]
+
+    # LAST RETURNS KEPT FOR THE ROLLING VOLATILITY, A YEAR BY DEFAULT.
+    _performance_windows = {"daily": 252, "weekly": 52, "monthly": 12}
+
+    _queries = {
+        "factor_returns": queries.FactorReturnsQueries,
+        "factor_quantile_returns": queries.FactorQuantileReturnsQueries,
+        "factor_ic": queries.FactorICQueries,
+    }
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        source: Optional[Source] = None,
+        target: Optional[Target] = None,
+        timeframes: Optional[str] = None,
+    ) -> None:
+        # A SINGLE TIMEFRAME, A COMMA SEPARATED LIST OR "all".
+        self.timeframes = self.parse_timeframes(
+            timeframes or os.environ.get("TIMEFRAME", "")
+        )
+        # MARKET CAP BUCKETS AS "class:min:max,...", MIN EXCLUDED AND MAX INCLUDED.
+        if os.environ.get("MKT_CAP_RANGES"):
+            self._mkt_cap_ranges = self.parse_mkt_cap_ranges(
+                os.environ["MKT_CAP_RANGES"]
+            )
+        # BASKET SIZES AS "20,50,100" OR "10:500:10" FOR 10 TO 500 IN STEPS OF 10.
+        if os.environ.get("SELECTION_AMOUNTS"):
+            self._selection_amounts = self.parse_selection_amounts(
+                os.environ["SELECTION_AMOUNTS"]
+            )
+        # QUANTILE PORTFOLIOS PER BUCKET, E.G. "5,10" FOR QUINTILES AND DECILES.
+        self.quantiles = self.parse_quantiles(os.environ.get("QUANTILES", ""))
+        # RANK IC OF EVERY FACTOR PER DATE AND MARKET CAP BUCKET, IN FACTOR_IC.
+        self.ic = os.environ.get("IC", "false").lower() == "true"
+        # RUNNING PERFORMANCE OF EVERY PORTFOLIO, FOLDED INTO FACTOR_PERFORMANCE
+        # ON EVERY COMMIT. PERFORMANCE_WINDOW OVERRIDES THE ROLLING WINDOW.
+        self.performance = os.environ.get("PERFORMANCE", "false").lower() == "true"
+        self.performance_window = (
+            int(os.environ["PERFORMANCE_WINDOW"])
+            if os.environ.get("PERFORMANCE_WINDOW")
+            else None
+        )
+        self.performance_states: Dict[Tuple, model.FactorPerformance] = {}
+        # RETRIES OF READS AND WRITE BATCHES ON CONNECTION ERRORS, WITH
+        # EXPONENTIAL BACKOFF STARTING AT DB_RETRY_BACKOFF SECONDS.
+        self.db_retries = int(os.environ.get("DB_RETRIES", 3))
+        self.db_retry_backoff = float(os.environ.get("DB_RETRY_BACKOFF", 1.0))
+        # OVERLAPS FETCH, COMPUTE AND PERSIST OF CONSECUTIVE WINDOWS.
+        self.pipeline = os.environ.get("PIPELINE", "false").lower() == "true"
+        self.pipeline_depth = int(os.environ.get("PIPELINE_DEPTH", 1))
+        self.source_pool: Optional[ConnectionPool] = None
+        self.target_pool: Optional[ConnectionPool] = None
+        if len(self.timeframes) > 1 and source is None and target is None:
+            # ONE CONNECTION PER TIMEFRAME PIPELINE PLUS THE SCHEDULER'S OWN.
+            pool_size = len(self.timeframes) + 1
+            # PIPELINED, THE FETCH STAGE OF EACH TIMEFRAME READS ON ITS OWN.
+            source_pool_size = pool_size + len(self.timeframes) * self.pipeline
+            self.source_pool = ConnectionPool(
+                0, source_pool_size, os.environ.get("SOURCE")
+            )
+            self.target_pool = ConnectionPool(0, pool_size, os.environ.get("TARGET"))
+        # "decimal" (default) or "float" to read NUMERIC columns as float64.
+        self.numeric = os.environ.get("NUMERIC", "decimal").lower()
+        # READ-THROUGH PARQUET CACHE OF THE SOURCE RECORDS, IF CACHE_DIR IS SET.
+        self.cache_dir = os.environ.get("CACHE_DIR")
+        self.cache_max_bytes = int(os.environ.get("CACHE_MAX_MB", 10_240)) * 2**20
+        # CONNECTED ON FIRST USE, CONSTRUCTING A LOADER PERFORMS NO I/O.
+        self._source = source
+        self._target = target
+        self._configs: Optional[List[model.Config]] = None
+        self.timeframe = self.timeframes[0] if len(self.timeframes) == 1 else None
+        # "values" (default) upserts with execute_values, "copy" bulk loads.
+        self.writer = os.environ.get("WRITER", "values").lower()
+        # "object" (default), "numpy" for the columnar engine or "sql" to select
+        # the rows in the source database.
+        self.engine = os.environ.get("ENGINE", "object").lower()
+        # EVALUATES EVERY FACTOR OF A SOURCE TABLE IN ONE PASS PER DATE.
+        self.multi_factor = os.environ.get("MULTI_FACTOR", "false").lower() == "true"
+        # STREAMS ONE DATE AT A TIME THROUGH A SERVER-SIDE CURSOR.
+        self.stream = os.environ.get("STREAM", "false").lower() == "true"
+        self.itersize = int(os.environ.get("ITERSIZE", 10_000))
+        # WORK UNITS OF AT MOST CHUNK_DATES DATES AND, IF SET, CHUNK_ROWS ROWS.
+        self.chunk_dates = int(os.environ.get("CHUNK_DATES", 250))
+        self.chunk_rows = (
+            int(os.environ["CHUNK_ROWS"]) if os.environ.get("CHUNK_ROWS") else None
+        )
+        # DATES AFTER WHICH A BACKFILL RECOMPUTES RETURNS, PAST CHECKPOINTS.
+        self.backfill_after: Optional[datetime] = None
+        # RUNS THE CONFIGS OF A SOURCE TABLE ON A PROCESS POOL.
+        self.workers = workers or int(os.environ.get("LOADER_WORKERS", 1))
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+        # COMMITS EVERY COMMIT_CONFIGS CONFIGS, COMMIT_ROWS ROWS OR COMMIT_SECONDS
+        # SECONDS, WHICHEVER COMES FIRST. EVERY CONFIG IF NONE IS SET.
+        self.commit_rows = (
+            int(os.environ["COMMIT_ROWS"]) if os.environ.get("COMMIT_ROWS") else None
+        )
+        self.commit_seconds = (
+            float(os.environ["COMMIT_SECONDS"])
+            if os.environ.get("COMMIT_SECONDS")
+            else None
+        )
+        self.commit_configs = (
+            int(os.environ["COMMIT_CONFIGS"])
+            if os.environ.get("COMMIT_CONFIGS")
+            else None if self.commit_rows or self.commit_seconds else 1
+        )
+        self.batch: List[Tuple[model.Config, datetime, List[Tuple]]] = []
+        self.batch_started: Optional[float] = None
+        # STAGE TIMINGS, LOGGED AT THE END AND WRITTEN TO METRICS_FILE IF SET.
+        self.stats = Stats(
+            enabled=os.environ.get("METRICS", "false").lower() == "true",
+            metrics_file=os.environ.get("METRICS_FILE"),
+        )
+        # THE CACHE SERVES FETCHED WINDOWS ONLY, STREAMED ROWS AND SQL SELECTIONS
+        # ARE ALWAYS READ FROM THE SOURCE DATABASE.
+        if self.cache_dir and (self.stream or self.engine == "sql"):
+            logger.warning(
+                "CACHE_DIR is ignored with STREAM=true or ENGINE=sql, "
+                "reading from the source database."
+            )
+            self.cache_dir = None
+        # STREAMED AND SQL RUNS NEVER BUILD THE WINDOW HISTORY WORKERS RUN ON.
+        if self.workers > 1 and (self.stream or self.engine == "sql"):
+            logger.warning(
+                "LOADER_WORKERS is ignored with STREAM=true or ENGINE=sql, "
+                "running in a single process."
+            )
+            self.workers = 1
+        # WORKERS RECEIVE THE HISTORY AS PACKED COLUMNS, THE DECIMAL COLUMNS
+        # BEING CONVERTED TO FLOAT64 ONCE, AT FETCH TIME.
+        if self.workers > 1 and self.engine == "object":
+            logger.info("Worker processes share columnar history, using numpy engine.")
+            self.engine = "numpy"
+
+    @property
+    def source(self) -> Source:
+        """Source, connected on first use."""
+        if self._source is None:
+            self._source = self.connect_source()
+        return self._source
+
+    @source.setter
+    def source(self, source: Source) -> None:
+        self._source = source
+
+    @property
+    def target(self) -> Target:
+        """Target, connected on first use."""
+        if self._target is None:
+            self._target = self.connect_target()
+        return self._target
+
+    @target.setter
+    def target(self, target: Target) -> None:
+        self._target = target
+
+    @property
+    def configs(self) -> List[model.Config]:
+        """Configs of the timeframes to run, fetched on first use."""
+        if self._configs is None:
+            self._configs = self.set_configs()
+        return self._configs
+
+    @configs.setter
+    def configs(self, configs: List[model.Config]) -> None:
+        self._configs = configs
+
+    @property
+    def config_groups(self) -> Dict[Tuple[str, str], List[model.Config]]:
+        """Configs grouped by timeframe and source table."""
+        return self.group_configs(self.configs)
+
+    def connect_source(self) -> Source:
+        """Source connection, behind the Parquet cache if enabled."""
+        if self.cache_dir:
+            return CachedSource(
+                os.environ.get("SOURCE"),
+                cache_dir=self.cache_dir,
+                max_bytes=self.cache_max_bytes,
+                pool=self.source_pool,
+                numeric=self.numeric,
+                retries=self.db_retries,
+                backoff=self.db_retry_backoff,
+            )
+
+        return Source(
+            os.environ.get("SOURCE"),
+            pool=self.source_pool,
+            numeric=self.numeric,
+            retries=self.db_retries,
+            backoff=self.db_retry_backoff,
+        )
+
+    def connect_target(self) -> Target:
+        """Target connection."""
+        return Target(
+            os.environ.get("TARGET"),
+            pool=self.target_pool,
+            retries=self.db_retries,
+            backoff=self.db_retry_backoff,
+        )
+
+    def set_configs(self):
+        raw_configs = self.source.fetch_configs()
+        configs = [model.Config.build_record(c) for c in raw_configs]
+        configs = [c for c in configs if c.timeframe in self.timeframes]
+        return configs
+
+    def parse_timeframes(self, timeframes: str) -> List[str]:
+        """Parses the timeframes to run."""
+        if timeframes.strip().lower() == "all":
+            return list(self._timeframes)
+
+        return [t.strip().lower() for t in timeframes.split(",") if t.strip()]
+
+    @staticmethod
+    def parse_mkt_cap_ranges(mkt_cap_ranges: str) -> Dict[str, Tuple[int, int]]:
+        """Parses market cap buckets given as "class:min:max", comma separated."""
+        res = {}
+        for bucket in mkt_cap_ranges.split(","):
+            mkt_cap_class, min_mkt_cap, max_mkt_cap = bucket.strip().split(":")
+            if int(min_mkt_cap) >= int(max_mkt_cap):
+                raise ValueError(f"Empty market cap range: {bucket.strip()}.")
+            res[mkt_cap_class.strip().lower()] = (int(min_mkt_cap), int(max_mkt_cap))
+
+        return res
+
+    @staticmethod
+    def parse_selection_amounts(selection_amounts: str) -> List[int]:
+        """Parses basket sizes, comma separated sizes or "start:stop:step" ranges.
+
+        Ranges include their stop, "10:500:10" is 10, 20, ..., 500.
+        """
+        res = set()
+        for amount in selection_amounts.split(","):
+            if ":" in amount:
+                start, stop, step = (int(a) for a in amount.split(":"))
+                res.update(range(start, stop + 1, step))
+            else:
+                res.add(int(amount))
+        if not res or min(res) < 1:
+            raise ValueError(f"Invalid selection amounts: {selection_amounts}.")
+
+        return sorted(res)
+
+    @staticmethod
+    def parse_quantiles(quantiles: str) -> List[int]:
+        """Parses the numbers of quantiles, comma separated."""
+        res = sorted({int(q) for q in quantiles.split(",") if q.strip()})
+        if res and min(res) < 2:
+            raise ValueError(f"Invalid quantiles: {quantiles}.")
+
+        return res
+
+    def for_timeframe(self, timeframe: str) -> "Loader":
+        """Pipeline of a single timeframe, on its own pooled connections."""
+        pipeline = copy.copy(self)
+        pipeline.timeframe = timeframe
+        pipeline.timeframes = [timeframe]
+        pipeline.source = self.connect_source()
+        pipeline.target = self.connect_target()
+        pipeline.configs = [c for c in self.configs if c.timeframe == timeframe]
+        pipeline.batch = []
+        pipeline.process_pool = None
+
+        return pipeline
+
+    def run_timeframes(self):
+        """Runs the pipeline of every timeframe concurrently.
+
+        Each pipeline resumes from its own checkpoint, so the wall-clock time is
+        bounded by the slowest timeframe.
+        """
+        logger.info(f"Running {', '.join(self.timeframes)} concurrently...")
+        pipelines = [self.for_timeframe(t) for t in self.timeframes]
+        try:
+            with ThreadPoolExecutor(max_workers=len(pipelines)) as executor:
+                futures = [executor.submit(p.run_timeframe) for p in pipelines]
+                for future in futures:
+                    future.result()
+        finally:
+            for pipeline in pipelines:
+                pipeline.source.disconnect()
+                pipeline.target.disconnect()
+
+    @staticmethod
+    def group_configs(configs: List[model.Config]):
+        """Groups configs sharing the same timeframe and source table."""
+        groups: Dict[Tuple[str, str], List[model.Config]] = {}
+        for config in configs:
+            groups.setdefault((config.timeframe, config.source_table), []).append(
+                config
+            )
+
+        return groups
+
+    def run(self):
+        if len(self.timeframes) > 1:
+            self.run_timeframes()
+        else:
+            self.run_timeframe()
+
+        self.stats.report()
+
+    def backfill(self, start: datetime, factors: Optional[List[str]] = None):
+        """Recomputes the returns from a date onwards, ignoring checkpoints.
+
+        Args:
+            start: first date to recompute.
+            factors: factors to recompute, every factor if not given.
+        """
+        if factors:
+            factors = [f.lower() for f in factors]
+            self.configs = [c for c in self.configs if c.factor in factors]
+        self.backfill_after = start - timedelta(microseconds=1)
+        self.run()
+        if self.performance:
+            self.rebuild_performance(factors)
+
+    def rebuild_performance(self, factors: Optional[List[str]] = None):
+        """Recomputes the running performance from the stored returns.
+
+        Needed after returns are rewritten, which incremental folds skip.
+
+        Args:
+            factors: factors to recompute, every factor if not given.
+        """
+        for timeframe in self.timeframes:
+            logger.info(f"Rebuilding {timeframe} performance...")
+            self.target.retry(lambda: self.write_performance(timeframe, factors))
+
+    def write_performance(self, timeframe: str, factors: Optional[List[str]] = None):
+        """Replaces the running performance of a timeframe and commits."""
+        states = performance.fold_returns(
+            {},
+            self.target.stream_returns(timeframe, factors, self.itersize),
+            self.get_performance_window(timeframe),
+        )
+        self.target.delete_performance(timeframe, factors)
+        if states:
+            self.target.execute(
+                queries.FactorPerformanceQueries.UPSERT,
+                [p.as_tuple() for p in states.values()],
+            )
+        self.target.commit_transaction()
+
+    def get_performance_window(self, timeframe: str) -> int:
+        """Number of last returns kept for the rolling volatility."""
+        return self.performance_window or self._performance_windows.get(timeframe, 252)
+
+    def disconnect(self):
+        """Disconnects the source and target, if connected."""
+        self.shutdown_workers()
+        if self._source is not None:
+            self._source.disconnect()
+        if self._target is not None:
+            self._target.disconnect()
+        for pool in (self.source_pool, self.target_pool):
+            if pool is not None and not pool.closed:
+                pool.closeall()
+
+    def run_timeframe(self):
+        logger.info(f"Starting process for {self.timeframe}...")
+
+        checkpoints = self.target.fetch_checkpoints(self.timeframe)
+        for config in self.configs:
+            config.last_date_persisted = checkpoints.get(config.factor)
+            if self.backfill_after is not None:
+                config.last_date_persisted = self.backfill_after
+        if self.performance:
+            self.performance_states = self.target.fetch_performance(self.timeframe)
+
+        try:
+            if self.pipeline:
+                self.run_pipelined()
+            else:
+                self.run_windows()
+        finally:
+            self.shutdown_workers()
+
+        logger.info("Process finished.")
+
+    def run_windows(self):
+        """Fetches, computes and persists every window, one after the other."""
+        n = len(self.config_groups)
+        i = 0
+        for (timeframe, source_table), group in self.config_groups.items():
+            logger.info(f"Processed {i}/{n} source tables.")
+            windows = self.plan_windows(group)
+            logger.info(
+                f"Processing {len(windows)} windows from {timeframe}_{source_table}..."
+            )
+            for window in windows:
+                logger.info(f"Processing records from {window[0]} to {window[1]}...")
+                self.run_window(window, group)
+            i += 1
+        self.commit()
+
+    def plan_windows(self, configs: List[model.Config]):
+        """Splits the dates still needed by the configs into work units.
+
+        Work units are derived from the distinct dates of the source table past
+        the earliest checkpoint, chunked by number of dates or of rows.
+        """
+        checkpoints = [c.last_date_persisted for c in configs]
+        after = None if None in checkpoints else min(checkpoints)
+
+        date_counts = self.source.fetch_date_counts(
+            timeframe=configs[0].timeframe,
+            source_table=configs[0].source_table,
+            after=after,
+        )
+
+        return chunk_dates(
+            date_counts, max_dates=self.chunk_dates, max_rows=self.chunk_rows
+        )
+
+    def run_window(self, window, configs: List[model.Config]):
+        """Runs and persists every config of a source table on a window."""
+        history = None
+        if not self.stream and self.engine != "sql":
+            history = self.build_history(window, configs[0])
+        for config, max_date, records in self.compute_window(window, configs, history):
+            self.persist_config(window, config, max_date, records)
+
+    def run_pipelined(self):
+        """Fetches, computes and persists consecutive windows concurrently.
+
+        The next window is fetched and the previous results are persisted while
+        the current window is computed. Stages are connected by queues holding at
+        most PIPELINE_DEPTH items, which bounds memory. A single persister
+        commits in order, so a checkpoint never runs ahead of its returns.
+        """
+        fetched: queue.Queue = queue.Queue(maxsize=self.pipeline_depth)
+        computed: queue.Queue = queue.Queue(maxsize=self.pipeline_depth)
+        stop = threading.Event()
+        # THE FETCH STAGE READS ON ITS OWN CONNECTION: A CONNECTION ERROR IN ONE
+        # STAGE DISCARDS ONLY THAT STAGE'S CONNECTION, NEVER THE OTHER'S.
+        fetch_loader = copy.copy(self)
+        fetch_loader.source = self.connect_source()
+
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                fetcher = executor.submit(fetch_loader.fetch_stage, fetched, stop)
+                persister = executor.submit(self.persist_stage, computed, stop)
+                try:
+                    while True:
+                        item = self.get(fetched, stop)
+                        if item is None:
+                            break
+                        window, configs, history = item
+                        logger.info(
+                            f"Processing records from {window[0]} to {window[1]}..."
+                        )
+                        for result in self.compute_window(window, configs, history):
+                            if not self.put(computed, (window, *result), stop):
+                                break
+                    self.put(computed, None, stop)
+                except BaseException:
+                    stop.set()
+                    raise
+                finally:
+                    fetcher.result()
+                    persister.result()
+        finally:
+            fetch_loader.source.disconnect()
+
+    def fetch_stage(self, fetched: queue.Queue, stop: threading.Event):
+        """Fetches the history of every window, in order."""
+        try:
+            for (timeframe, source_table), group in self.config_groups.items():
+                windows = self.plan_windows(group)
+                logger.info(
+                    f"Processing {len(windows)} windows from {timeframe}_{source_table}..."
+                )
+                for window in windows:
+                    # STREAMED AND SQL WINDOWS ARE READ BY THE COMPUTE STAGE ITSELF.
+                    history = None
+                    if not self.stream and self.engine != "sql":
+                        history = self.build_history(window, group[0])
+                    if not self.put(fetched, (window, group, history), stop):
+                        return
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            self.put(fetched, None, stop)
+
+    def persist_stage(self, computed: queue.Queue, stop: threading.Event):
+        """Persists the results of every config, in the order they were computed."""
+        try:
+            while True:
+                item = self.get(computed, stop)
+                if item is None:
+                    break
+                self.persist_config(*item)
+            if not stop.is_set():
+                self.commit()
+        except BaseException:
+            stop.set()
+            raise
+
+    @staticmethod
+    def put(q: queue.Queue, item, stop: threading.Event) -> bool:
+        """Blocks until the item is queued, False if the pipeline stopped."""
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+
+        return False
+
+    @staticmethod
+    def get(q: queue.Queue, stop: threading.Event):
+        """Blocks until an item is available, None if the pipeline stopped."""
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+        return None
+
+    def compute_window(
+        self,
+        window,
+        configs: List[model.Config],
+        history: Optional[Dict] = None,
+    ) -> Iterator[Tuple[model.Config, Optional[datetime], Dict[str, List[Tuple]]]]:
+        """Computes every config of a source table on a window.
+
+        Returns:
+            Iterator over the config, the last date of the window and records
+            per target table.
+        """
+        group_records: Optional[Dict[str, Dict[str, List[Tuple]]]] = None
+        labels = (configs[0].timeframe, configs[0].source_table)
+        if self.engine == "sql":
+            dates = self.source.fetch_dates(*labels, date_range=window)
+            max_date = dates[-1] if dates else None
+        elif self.stream:
+            # FETCH AND CURATE OF THE STREAMED DATES ARE NESTED IN THIS COMPUTE.
+            with self.stats.measure("compute", *labels, window=window) as measured:
+                group_records, max_date = self.run_group(
+                    self.stream_history(window, configs[0]), configs
+                )
+                measured.rows = sum(map(self.count, group_records.values()))
+        else:
+            max_date = max(history.keys()) if history else None
+            with self.stats.measure("compute", *labels, window=window) as measured:
+                if self.workers > 1 and history:
+                    group_records = self.run_parallel(history, configs)
+                elif self.multi_factor and history:
+                    group_records, _ = self.run_group(
+                        sorted(history.items(), key=itemgetter(0)), configs
+                    )
+                if group_records is not None:
+                    measured.rows = sum(map(self.count, group_records.values()))
+
+        m = len(configs)
+        j = 0
+        for config in configs:
+            logger.info(f"Processed {j}/{m} configs.")
+            logger.info(f"Processing {config}...")
+            records: Dict[str, List[Tuple]] = {}
+            if max_date and config.is_pending(max_date):
+                if self.engine == "sql":
+                    with self.stats.measure(
+                        "compute", *labels, config.factor, window
+                    ) as measured:
+                        records = self.run_config_sql(window, config, dates)
+                        measured.rows = self.count(records)
+                elif group_records is not None:
+                    records = group_records[config.factor]
+                else:
+                    with self.stats.measure(
+                        "compute", *labels, config.factor, window
+                    ) as measured:
+                        records = self.run_config(history, config)
+                        measured.rows = self.count(records)
+
+            yield config, max_date, records
+            j += 1
+
+    def persist_config(
+        self,
+        window,
+        config: model.Config,
+        max_date: Optional[datetime],
+        records: Dict[str, List[Tuple]],
+    ):
+        """Persists the records of a config computed on a window, if any."""
+        if max_date and self.count(records):
+            labels = (config.timeframe, config.source_table, config.factor)
+            with self.stats.measure("persist", *labels, window) as measured:
+                self.persist(config, max_date, records)
+                measured.rows = self.count(records)
+                measured.bytes = sum(map(self.stats.estimate_bytes, records.values()))
+        else:
+            logger.info(f"No records left to process for {config}.")
+
+    @staticmethod
+    def count(records: Dict[str, List[Tuple]]) -> int:
+        """Number of records over every target table."""
+        return sum(len(rows) for rows in records.values())
+
+    def persist(
+        self, config: model.Config, max_date: datetime, records: Dict[str, List[Tuple]]
+    ):
+        """Adds the returns of a config to the batch, committed per the policy."""
+        self.batch.append((config, max_date, records))
+        if self.batch_started is None:
+            self.batch_started = time.monotonic()
+        if self.commit_due():
+            self.commit()
+
+    def commit_due(self) -> bool:
+        """Whether the batch reached the configs, rows or seconds to commit."""
+        if self.commit_configs and len(self.batch) >= self.commit_configs:
+            return True
+        if (
+            self.commit_rows
+            and sum(self.count(b[2]) for b in self.batch) >= self.commit_rows
+        ):
+            return True
+        if (
+            self.commit_seconds
+            and time.monotonic() - self.batch_started >= self.commit_seconds
+        ):
+            return True
+
+        return False
+
+    def commit(self):
+        """Writes and commits the batch, along with the checkpoints it covers.
+
+        The whole transaction is retried on connection errors, the upserts
+        being idempotent.
+        """
+        if not self.batch:
+            return
+
+        batch = self.batch
+        states = self.fold_performance(batch)
+        with self.stats.measure("commit", self.timeframe or "") as measured:
+            self.target.retry(lambda: self.write(batch, states))
+            measured.rows = sum(self.count(b[2]) for b in batch)
+        for config, max_date, _ in batch:
+            config.last_date_persisted = max_date
+        self.performance_states.update(states)
+        self.batch = []
+        self.batch_started = None
+
+    def fold_performance(
+        self, batch: List[Tuple[model.Config, datetime, Dict[str, List[Tuple]]]]
+    ) -> Dict[Tuple, model.FactorPerformance]:
+        """Running performance updated with the returns of a batch, if enabled.
+
+        A backfill rewrites past returns, its performance is rebuilt instead.
+        """
+        if not self.performance or self.backfill_after is not None:
+            return {}
+
+        rows = [r for _, _, records in batch for r in records.get("factor_returns", [])]
+        rows.sort(key=itemgetter(0))
+
+        return performance.fold_returns(
+            self.performance_states,
+            rows,
+            self.get_performance_window(self.timeframe),
+        )
+
+    def write(
+        self,
+        batch: List[Tuple[model.Config, datetime, Dict[str, List[Tuple]]]],
+        states: Optional[Dict[Tuple, model.FactorPerformance]] = None,
+    ):
+        """Upserts the records, checkpoints and performance of a batch and commits."""
+        # THE LAST CHECKPOINT OF EACH CONFIG, A ROW CAN ONLY BE UPSERTED ONCE.
+        checkpoints = {(c.factor, c.timeframe): (c, d) for c, d, _ in batch}
+        config_records = [
+            (
+                config.factor.upper(),
+                config.timeframe.upper(),
+                max_date,
+                config.source_table.upper(),
+            )
+            for config, max_date in checkpoints.values()
+        ]
+        tables: Dict[str, List[Tuple]] = {}
+        for _, _, records in batch:
+            self.extend(tables, records)
+
+        self.target.execute(queries.ConfigQueries.UPSERT, config_records)
+        for table, rows in tables.items():
+            if not rows:
+                continue
+            table_queries = self._queries[table]
+            if self.writer == "copy":
+                self.target.copy_upsert(
+                    stage_query=table_queries.CREATE_STAGE,
+                    copy_query=table_queries.COPY_STAGE,
+                    merge_query=table_queries.MERGE_STAGE,
+                    records=rows,
+                )
+            else:
+                self.target.execute(table_queries.UPSERT, rows)
+        if states:
+            self.target.execute(
+                queries.FactorPerformanceQueries.UPSERT,
+                [p.as_tuple() for p in states.values()],
+            )
+        self.target.commit_transaction()
+
+    def build_history(self, date_range, config):
+        history: Dict[
+            datetime, Union[List[model.BaseData], List[model.MetricsData]]
+        ] = {}
+
+        labels = (config.timeframe, config.source_table)
+
+        logger.debug("Fetching records...")
+        with self.stats.measure("fetch", *labels, window=date_range) as m:
+            raw_records = self.source.get_records(
+                timeframe=config.timeframe,
+                source_table=config.source_table,
+                date_range=date_range,
+                columns=self.source_columns(config),
+            )
+            m.rows = len(raw_records) if raw_records else 0
+            m.bytes = self.stats.estimate_bytes(raw_records)
+
+        with self.stats.measure("curate", *labels, window=date_range) as m:
+            m.rows = len(raw_records) if raw_records else 0
+            if raw_records and self.engine == "numpy":
+                logger.debug("Building columnar history per date...")
+                history = self.build_columnar_history(raw_records, config)
+            elif raw_records:
+                logger.debug("Curating records...")
+                curated_records = self.curate_records(raw_records, config)
+
+                if curated_records:
+                    logger.debug("Building history per date...")
+                    for record in curated_records:
+                        if record.datadate not in history.keys():
+                            history[record.datadate] = [record]
+                        else:
+                            history[record.datadate].append(record)
+
+        return history
+
+    def stream_history(
+        self, date_range, config
+    ) -> Iterator[Tuple[datetime, Union[List, columnar.CrossSection]]]:
+        """Yields the curated records of one date at a time.
+
+        Only a single cross-section is held in memory, records are streamed
+        ordered by date through a server-side cursor.
+        """
+        labels = (config.timeframe, config.source_table)
+
+        logger.debug("Streaming records...")
+        raw_records = self.stats.iterate(
+            self.source.stream_records(
+                timeframe=config.timeframe,
+                source_table=config.source_table,
+                date_range=date_range,
+                itersize=self.itersize,
+                columns=self.source_columns(config),
+            ),
+            "fetch",
+            *labels,
+            window=date_range,
+        )
+        for d, rows in groupby(raw_records, key=itemgetter(0)):
+            rows = list(rows)
+            with self.stats.measure("curate", *labels, window=date_range) as m:
+                m.rows = len(rows)
+                if self.engine == "numpy":
+                    records = self.build_cross_section(rows, config)
+                else:
+                    records = self.curate_records(rows, config)
+            yield d, records
+
+    def curate_records(self, raw_records: Iterable[Tuple], config: model.Config):
+        """Builds record objects for the source table of the config."""
+        columns = self.source_columns(config)
+        if config.source_table == "base":
+            return model.BaseData.build_records(raw_records, columns)
+        if config.source_table == "metrics":
+            return model.MetricsData.build_records(raw_records, columns)
+        return []
+
+    def source_factors(self, config: model.Config) -> List[str]:
+        """Factor columns of the configs sharing the source table of the config."""
+        return sorted(
+            {
+                c.factor
+                for c in self.configs
+                if c.source_table == config.source_table and c.factor != "benchmark"
+            }
+        )
+
+    def source_columns(self, config: model.Config) -> Tuple[str, ...]:
+        """Columns of the source table needed by the configs in play."""
+        return (
+            "datadate",
+            "gvkey",
+            "market_cap",
+            "winsorized_5_rtn",
+            *self.source_factors(config),
+        )
+
+    def build_columnar_history(self, raw_records, config):
+        """Builds a columnar cross-section per date from raw records."""
+        rows_per_date: Dict[datetime, List] = {}
+        for record in raw_records:
+            rows_per_date.setdefault(record[0], []).append(record)
+
+        return {
+            d: self.build_cross_section(rows, config)
+            for d, rows in rows_per_date.items()
+        }
+
+    def build_cross_section(self, rows: List[Tuple], config: model.Config):
+        """Builds the columnar cross-section of a single date."""
+        return columnar.CrossSection.from_rows(
+            rows, self.source_columns(config), self.source_factors(config)
+        )
+
+    def run_config(
+        self,
+        history: Dict[datetime, Union[List[model.BaseData], List[model.MetricsData]]],
+        config: model.Config,
+    ) -> Dict[str, List[Tuple]]:
+        """Runs a configuration through the provided history."""
+        dates = list(history.keys())
+        dates.sort()
+
+        res: Dict[str, List[Tuple]] = {}
+        for d in dates:
+            if config.is_pending(d):
+                self.extend(res, self.run_date(d, history[d], config))
+
+        return res
+
+    def run_config_sql(
+        self, window, config: model.Config, dates: List[datetime]
+    ) -> Dict[str, List[Tuple]]:
+        """Runs a configuration on the rows selected by the source database.
+
+        Only the extremes of each market cap bucket cross the wire, in factor
+        order, which is all ``get_top_flop`` needs: their first and last
+        selection_amount rows are the flop and top baskets and the bucket is
+        consistent whenever both ends are full. Ties in the factor are broken
+        by gvkey and benchmark gvkeys are listed by gvkey, as in the other
+        engines. Quantile portfolios are summed and the rank IC is computed by
+        the source database too.
+        """
+        dates = [d for d in dates if config.is_pending(d)]
+        if not dates:
+            return {}
+
+        factor = None if config.factor == "benchmark" else config.factor
+        rows = self.source.fetch_selections(
+            timeframe=config.timeframe,
+            source_table=config.source_table,
+            date_range=(dates[0], window[1]),
+            mkt_cap_ranges=self._mkt_cap_ranges,
+            factor=factor,
+            selection_amount=max(self._selection_amounts),
+        )
+        selections = {d: {c: [] for c in self._mkt_cap_ranges} for d in dates}
+        for d, mkt_cap_class, *holding in rows:
+            selections[d][mkt_cap_class].append(model.Holding.build_record(holding))
+
+        res: Dict[str, List[Tuple]] = {"factor_returns": []}
+        for d in dates:
+            if factor is None:
+                returns_dict = compute.get_benchmark_rtn(selections[d])
+            else:
+                returns_dict = compute.get_top_flop(
+                    selections[d], self._selection_amounts
+                )
+            res["factor_returns"].extend(
+                compute.compute_returns(d, config, returns_dict)
+            )
+
+        if self.quantiles and factor is not None:
+            rows = self.source.fetch_quantiles(
+                timeframe=config.timeframe,
+                source_table=config.source_table,
+                date_range=(dates[0], window[1]),
+                mkt_cap_ranges=self._mkt_cap_ranges,
+                factor=factor,
+                quantiles=self.quantiles,
+            )
+            portfolios = {
+                d: {
+                    c: {q: {"sums": [0] * q, "sizes": [0] * q} for q in self.quantiles}
+                    for c in self._mkt_cap_ranges
+                }
+                for d in dates
+            }
+            for d, mkt_cap_class, q, quantile, rtn_sum, size in rows:
+                portfolios[d][mkt_cap_class][q]["sums"][quantile] = rtn_sum
+                portfolios[d][mkt_cap_class][q]["sizes"][quantile] = size
+            res["factor_quantile_returns"] = [
+                r
+                for d in dates
+                for r in compute.compute_quantile_returns(d, config, portfolios[d])
+            ]
+
+        if self.ic and factor is not None:
+            rows = self.source.fetch_ic(
+                timeframe=config.timeframe,
+                source_table=config.source_table,
+                date_range=(dates[0], window[1]),
+                mkt_cap_ranges=self._mkt_cap_ranges,
+                factor=factor,
+            )
+            ics = {(d, c): (None, 0) for d in dates for c in self._mkt_cap_ranges}
+            ics.update({(d, c): (ic, n) for d, c, ic, n in rows})
+            res["factor_ic"] = [
+                model.FactorIC.build_record(
+                    (
+                        d,
+                        config.factor.upper(),
+                        config.timeframe.upper(),
+                        mkt_cap_class.upper(),
+                        *ics[(d, mkt_cap_class)],
+                    )
+                ).as_tuple()
+                for d in dates
+                for mkt_cap_class in self._mkt_cap_ranges
+            ]
+
+        return res
+
+    def run_parallel(
+        self,
+        history: Dict[datetime, columnar.CrossSection],
+        configs: List[model.Config],
+    ):
+        """Runs the configurations of a source table on a process pool.
+
+        The history is handed to every worker once, packed into a few column
+        buffers. Records are returned to the caller, which persists them.
+
+        Returns:
+            Records per factor.
+        """
+        packed_history = columnar.pack_history(history)
+        pool = self.get_process_pool()
+        # ONE TASK PER WORKER, THE HISTORY IS PICKLED ONCE PER TASK.
+        chunks = [configs[i :: self.workers] for i in range(self.workers)]
+        futures = [
+            (chunk, pool.submit(workers.run_configs, packed_history, chunk))
+            for chunk in chunks
+            if chunk
+        ]
+        records = {}
+        for chunk, future in futures:
+            records.update(zip((c.factor for c in chunk), future.result()))
+
+        return {c.factor: records[c.factor] for c in configs}
+
+    def get_process_pool(self) -> ProcessPoolExecutor:
+        """Process pool of the run, started on first use, shared by windows."""
+        if self.process_pool is None:
+            # SPAWNED, NOT FORKED: TIMEFRAME AND PIPELINE THREADS MAY HOLD LOGGING
+            # OR LIBPQ LOCKS AT FORK TIME, WHICH A FORKED CHILD WOULD INHERIT.
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=workers.init_worker,
+                initargs=(
+                    self._mkt_cap_ranges,
+                    self._selection_amounts,
+                    self.quantiles,
+                    self.ic,
+                ),
+            )
+
+        return self.process_pool
+
+    def shutdown_workers(self):
+        """Shuts the process pool of the run down, if started."""
+        if self.process_pool is not None:
+            self.process_pool.shutdown()
+            self.process_pool = None
+
+    def run_group(
+        self,
+        history: Iterable[Tuple[datetime, Union[List, columnar.CrossSection]]],
+        configs: List[model.Config],
+    ):
+        """Runs every configuration of a source table through the provided history.
+
+        The history is consumed one date at a time, in date order. The market
+        cap partition of each date is computed once and shared by every factor
+        of the group.
+
+        Returns:
+            Records per factor and the last date processed.
+        """
+        res: Dict[str, Dict[str, List[Tuple]]] = {c.factor: {} for c in configs}
+        last_date = None
+        for d, records in history:
+            last_date = d
+            pending = [c for c in configs if c.is_pending(d)]
+            if not pending:
+                continue
+            logger.debug("Partitioning market caps...")
+            engine = columnar if self.engine == "numpy" else compute
+            partition = engine.partition_mkt_cap(records, self._mkt_cap_ranges)
+            returns_by_id = None
+            if self.ic and engine is compute:
+                # RETURNS IN FLOAT FOR THE RANK IC, ONCE FOR EVERY FACTOR.
+                returns_by_id = compute.float_returns(partition)
+            for config in pending:
+                self.extend(
+                    res[config.factor],
+                    self.run_date(d, records, config, partition, returns_by_id),
+                )
+
+        return res, last_date
+
+    def run_date(
+        self,
+        d: datetime,
+        records,
+        config: model.Config,
+        partition=None,
+        returns_by_id=None,
+    ):
+        """Runs a configuration on the records of a single date."""
+        if self.engine == "numpy":
+            return columnar.run_date(
+                d,
+                records,
+                config,
+                self._mkt_cap_ranges,
+                self._selection_amounts,
+                partition,
+                self.quantiles,
+                self.ic,
+            )
+        return compute.run_date(
+            d,
+            records,
+            config,
+            self._mkt_cap_ranges,
+            self._selection_amounts,
+            partition,
+            self.quantiles,
+            self.ic,
+            returns_by_id,
+        )
+
+    @staticmethod
+    def extend(res: Dict[str, List[Tuple]], records: Dict[str, List[Tuple]]):
+        """Appends records per target table to those already in res."""
+        for table, rows in records.items():
+            res.setdefault(table, []).extend(rows)
@@ -1,5 +1,3 @@
-import os
-
 from factor_loader.persistence.target import Target
 import factor_loader.queries as queries
 
@@ -41,8 +39,8 @@ class LoaderConfig:
         "DAILY",
     ]
 
-    def set_configs(self) -> None:
-        target = Target(os.environ.get("TARGET"))
+    def set_configs(self, target: Target) -> None:
+        """Inserts the config of every factor and timeframe into the target."""
         configs = []
         for factor in self._factors:
             for timeframe in self._timeframes:
@@ -57,7 +55,3 @@ class LoaderConfig:
 
         target.execute(queries.ConfigQueries.SET_CONFIGS, configs)
         target.commit_transaction()
-
-
-config_loader = LoaderConfig()
-config_loader.set_configs()
@@ -2,8 +2,20 @@
 
 from .base_data import BaseData
 from .config import Config
+from .holding import Holding
 from .metrics_data import MetricsData
 from .factor_returns import FactorReturns
+from .factor_quantile_returns import FactorQuantileReturns
+from .factor_ic import FactorIC
+from .factor_performance import FactorPerformance
 
 
-__all__ = ["BaseData", "MetricsData", "FactorReturns"]
+__all__ = [
+    "BaseData",
+    "MetricsData",
+    "FactorReturns",
+    "FactorQuantileReturns",
+    "FactorIC",
+    "FactorPerformance",
+    "Holding",
+]
@@ -3,8 +3,8 @@
 from datetime import datetime
 from decimal import Decimal
 import logging
-from typing import Optional
-
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -12,48 +12,127 @@ logger = logging.getLogger(__name__)
 class BaseData:
     """Aggregate base record object class."""
 
+    COLUMNS = (
+        "datadate",
+        "gvkey",
+        "utilization_pct",
+        "bar",
+        "age",
+        "tickets",
+        "units",
+        "market_value_usd",
+        "loan_rate_avg",
+        "loan_rate_max",
+        "loan_rate_min",
+        "loan_rate_range",
+        "loan_rate_stdev",
+        "market_cap",
+        "shares_out",
+        "volume",
+        "rtn",
+        "winsorized_5_rtn",
+    )
+
+    __slots__ = COLUMNS
+
+    # GETTER OF THE COLUMNS OUT OF ROWS OF A PROJECTION, PER PROJECTION.
+    _getters: Dict[Tuple[str, ...], Tuple[itemgetter, bool]] = {}
+
     datadate: datetime
     gvkey: int
 
-    utilization_pct: Optional[Decimal] = None
-    bar: Optional[Decimal] = None
-    age: Optional[Decimal] = None
-    tickets: Optional[Decimal] = None
-    units: Optional[Decimal] = None
-    market_value_usd: Optional[Decimal] = None
-    loan_rate_avg: Optional[Decimal] = None
-    loan_rate_max: Optional[Decimal] = None
-    loan_rate_min: Optional[Decimal] = None
-    loan_rate_range: Optional[Decimal] = None
-    loan_rate_stdev: Optional[Decimal] = None
-
-    market_cap: Optional[Decimal] = None
-    shares_out: Optional[Decimal] = None
-    volume: Optional[Decimal] = None
-    rtn: Optional[Decimal] = None
-    winsorized_5_rtn: Optional[Decimal] = None
+    utilization_pct: Optional[Decimal]
+    bar: Optional[Decimal]
+    age: Optional[Decimal]
+    tickets: Optional[Decimal]
+    units: Optional[Decimal]
+    market_value_usd: Optional[Decimal]
+    loan_rate_avg: Optional[Decimal]
+    loan_rate_max: Optional[Decimal]
+    loan_rate_min: Optional[Decimal]
+    loan_rate_range: Optional[Decimal]
+    loan_rate_stdev: Optional[Decimal]
+
+    market_cap: Optional[Decimal]
+    shares_out: Optional[Decimal]
+    volume: Optional[Decimal]
+    rtn: Optional[Decimal]
+    winsorized_5_rtn: Optional[Decimal]
+
+    @classmethod
+    def getter(cls, columns: Tuple[str, ...]) -> Tuple[itemgetter, bool]:
+        """Getter of every column out of rows of the given columns, cached.
+
+        Columns left out of the rows are read from a None appended to them,
+        the flag tells whether rows must be padded so.
+        """
+        getter = cls._getters.get(columns)
+        if getter is None:
+            index = {c: i for i, c in enumerate(columns)}
+            positions = [index.get(c, len(columns)) for c in cls.COLUMNS]
+            getter = (itemgetter(*positions), len(columns) in positions)
+            cls._getters[tuple(columns)] = getter
+
+        return getter
+
+    @classmethod
+    def build_record(
+        cls, record: Tuple, columns: Tuple[str, ...] = COLUMNS
+    ) -> "BaseData":
+        """Builds a record object from a row, mapped by column position.
+
+        Args:
+            record: source row.
+            columns: column names of the row, in order. Columns left out of a
+                projected row are set to None.
+
+        Returns:
+            Record object.
+        """
+        return cls.build_records((record,), columns)[0]
 
     @classmethod
-    def build_record(cls, record):
-        res = cls()
-
-        res.datadate = record[0]
-        res.gvkey = record[1]
-        res.utilization_pct = record[2]
-        res.bar = record[3]
-        res.age = record[4]
-        res.tickets = record[5]
-        res.units = record[6]
-        res.market_value_usd = record[7]
-        res.loan_rate_avg = record[8]
-        res.loan_rate_max = record[9]
-        res.loan_rate_min = record[10]
-        res.loan_rate_range = record[11]
-        res.loan_rate_stdev = record[12]
-        res.market_cap = record[13]
-        res.shares_out = record[14]
-        res.volume = record[15]
-        res.rtn = record[16]
-        res.winsorized_5_rtn = record[17]
+    def build_records(
+        cls, records: Iterable[Tuple], columns: Tuple[str, ...] = COLUMNS
+    ) -> List["BaseData"]:
+        """Builds record objects from rows of the same columns.
+
+        Positions of the columns are resolved once for all the rows.
+
+        Args:
+            records: source rows.
+            columns: column names of the rows, in order. Columns left out of
+                projected rows are set to None.
+
+        Returns:
+            Record objects, in the order of the rows.
+        """
+        getter, padded = cls.getter(columns)
+        res = []
+        for record in records:
+            if padded:
+                record = (*record, None)
+            obj = cls()
+            (
+                obj.datadate,
+                obj.gvkey,
+                obj.utilization_pct,
+                obj.bar,
+                obj.age,
+                obj.tickets,
+                obj.units,
+                obj.market_value_usd,
+                obj.loan_rate_avg,
+                obj.loan_rate_max,
+                obj.loan_rate_min,
+                obj.loan_rate_range,
+                obj.loan_rate_stdev,
+                obj.market_cap,
+                obj.shares_out,
+                obj.volume,
+                obj.rtn,
+                obj.winsorized_5_rtn,
+            ) = getter(record)
+            res.append(obj)
 
         return res
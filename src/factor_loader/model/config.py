@@ -28,5 +28,9 @@ class Config:
 
         return res
 
+    def is_pending(self, datadate: datetime) -> bool:
+        """Whether a date is past the last date persisted for this config."""
+        return self.last_date_persisted is None or datadate > self.last_date_persisted
+
     def __repr__(self):
         return f"({self.factor.upper()}, {self.timeframe.upper()})"
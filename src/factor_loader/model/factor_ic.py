@@ -0,0 +1,58 @@
+"""Information coefficient model."""
+
+from datetime import datetime
+import logging
+from typing import Optional, Tuple
+
+from factor_loader.model.base import Modeling
+
+logger = logging.getLogger(__name__)
+
+
+class FactorIC(Modeling):
+    """Information coefficient record object class."""
+
+    datadate: datetime
+    factor: str
+    timeframe: str
+    mkt_cap_class: str
+
+    ic: Optional[float] = None
+    n_gvkeys: int
+
+    @classmethod
+    def build_record(cls, record: Tuple) -> "FactorIC":
+        """Builds Information Coefficient record object.
+
+        Args:
+            record: date, factor, timeframe, market cap class, rank IC and
+                number of gvkeys.
+
+        Returns:
+            Information Coefficient record object.
+        """
+        res = cls()
+
+        res.datadate = record[0]
+        res.factor = record[1]
+        res.timeframe = record[2]
+        res.mkt_cap_class = record[3]
+        res.ic = record[4]
+        res.n_gvkeys = record[5]
+
+        return res
+
+    def as_tuple(self) -> Tuple:
+        """Get tuple with object attributes.
+
+        Returns:
+            Tuple with object attributes.
+        """
+        return (
+            self.datadate,
+            self.factor,
+            self.timeframe,
+            self.mkt_cap_class,
+            self.ic,
+            self.n_gvkeys,
+        )
@@ -0,0 +1,88 @@
+"""Performance aggregate model."""
+
+from datetime import datetime
+import logging
+from typing import List, Optional, Tuple
+
+from factor_loader.model.base import Modeling
+
+logger = logging.getLogger(__name__)
+
+
+class FactorPerformance(Modeling):
+    """Performance aggregate record object class."""
+
+    factor: str
+    timeframe: str
+    mkt_cap_class: str
+    top: int
+
+    first_date: Optional[datetime] = None
+    last_date: Optional[datetime] = None
+    n_periods: int = 0
+
+    # RUNNING STATE OF THE RETURNS, IN FLOAT.
+    sum_rtn: float = 0.0
+    sum_sq_rtn: float = 0.0
+    wealth: float = 1.0
+    peak_wealth: float = 1.0
+    drawdown: float = 0.0
+    max_drawdown: float = 0.0
+    # LAST RETURNS, OLDEST FIRST, FOR THE ROLLING VOLATILITY.
+    window_rtns: List[float]
+
+    @classmethod
+    def build_record(cls, record: Tuple) -> "FactorPerformance":
+        """Builds Performance record object.
+
+        Args:
+            record: factor, timeframe, market cap class and top, followed by
+                the running state if any. A record of the key only builds the
+                state of an empty history.
+
+        Returns:
+            Performance record object.
+        """
+        res = cls()
+
+        res.factor = record[0]
+        res.timeframe = record[1]
+        res.mkt_cap_class = record[2]
+        res.top = record[3]
+        res.window_rtns = []
+        if len(record) > 4:
+            res.first_date = record[4]
+            res.last_date = record[5]
+            res.n_periods = record[6]
+            res.sum_rtn = record[7]
+            res.sum_sq_rtn = record[8]
+            res.wealth = record[9]
+            res.peak_wealth = record[10]
+            res.drawdown = record[11]
+            res.max_drawdown = record[12]
+            res.window_rtns = list(record[13])
+
+        return res
+
+    def as_tuple(self) -> Tuple:
+        """Get tuple with object attributes.
+
+        Returns:
+            Tuple with object attributes.
+        """
+        return (
+            self.factor,
+            self.timeframe,
+            self.mkt_cap_class,
+            self.top,
+            self.first_date,
+            self.last_date,
+            self.n_periods,
+            self.sum_rtn,
+            self.sum_sq_rtn,
+            self.wealth,
+            self.peak_wealth,
+            self.drawdown,
+            self.max_drawdown,
+            self.window_rtns,
+        )
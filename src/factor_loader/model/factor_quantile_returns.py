@@ -0,0 +1,74 @@
+"""Quantile returns model."""
+
+from datetime import datetime
+from decimal import Decimal
+import logging
+from typing import List, Optional, Tuple
+
+from factor_loader.model.base import Modeling
+
+logger = logging.getLogger(__name__)
+
+
+class FactorQuantileReturns(Modeling):
+    """Quantile returns record object class."""
+
+    datadate: datetime
+    factor: str
+    timeframe: str
+    mkt_cap_class: str
+    quantiles: int
+
+    # MEAN RETURN AND SIZE OF EVERY QUANTILE, IN ASCENDING ORDER OF THE FACTOR.
+    quantile_rtns: List[Optional[Decimal]]
+    quantile_sizes: List[int]
+    spread_rtn: Optional[Decimal] = None
+    consistent: Optional[bool] = None
+
+    @classmethod
+    def build_record(cls, record: Tuple) -> "FactorQuantileReturns":
+        """Builds Quantile Returns record object.
+
+        Args:
+            record: date, factor, timeframe, market cap class, number of
+                quantiles, and the sum and size of every quantile's returns.
+
+        Returns:
+            Quantile Returns record object.
+        """
+        res = cls()
+
+        res.datadate = record[0]
+        res.factor = record[1]
+        res.timeframe = record[2]
+        res.mkt_cap_class = record[3]
+        res.quantiles = record[4]
+        res.quantile_sizes = list(record[6])
+        res.quantile_rtns = [
+            s / n if n else None for s, n in zip(record[5], res.quantile_sizes)
+        ]
+        lowest, highest = res.quantile_rtns[0], res.quantile_rtns[-1]
+        res.spread_rtn = (
+            lowest - highest if lowest is not None and highest is not None else None
+        )
+        res.consistent = all(res.quantile_sizes)
+
+        return res
+
+    def as_tuple(self) -> Tuple:
+        """Get tuple with object attributes.
+
+        Returns:
+            Tuple with object attributes.
+        """
+        return (
+            self.datadate,
+            self.factor,
+            self.timeframe,
+            self.mkt_cap_class,
+            self.quantiles,
+            self.quantile_rtns,
+            self.quantile_sizes,
+            self.spread_rtn,
+            self.consistent,
+        )
@@ -2,9 +2,8 @@
 
 from datetime import datetime
 from decimal import Decimal
-import json
 import logging
-from typing import Dict, Optional, Tuple
+from typing import List, Optional, Tuple
 
 from factor_loader.model.base import Modeling
 
@@ -25,7 +24,9 @@ class FactorReturns(Modeling):
     rtn: Optional[Decimal] = None
     consistent: Optional[bool] = None
 
-    gvkeys: Optional[Dict]
+    long_gvkeys: Optional[List[int]]
+    # NONE WHEN IDENTICAL TO LONG_GVKEYS, E.G. FOR BENCHMARK ROWS.
+    short_gvkeys: Optional[List[int]]
 
     @classmethod
     def build_record(cls, record: Tuple) -> "FactorReturns":
@@ -48,7 +49,9 @@ class FactorReturns(Modeling):
         res.short_rtn = record[6]
         res.rtn = record[7]
         res.consistent = record[8]
-        res.gvkeys = json.dumps(record[9])
+        res.long_gvkeys = record[9]["LONG"]
+        short_gvkeys = record[9]["SHORT"]
+        res.short_gvkeys = None if short_gvkeys == res.long_gvkeys else short_gvkeys
 
         return res
 
@@ -68,5 +71,6 @@ class FactorReturns(Modeling):
             self.short_rtn,
             self.rtn,
             self.consistent,
-            self.gvkeys,
+            self.long_gvkeys,
+            self.short_gvkeys,
         )
@@ -0,0 +1,30 @@
+"""Holding model."""
+
+from decimal import Decimal
+import logging
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Holding:
+    """Selected row of a source table, as returned by the SQL engine."""
+
+    COLUMNS = ("gvkey", "winsorized_5_rtn")
+
+    __slots__ = COLUMNS
+
+    gvkey: int
+    winsorized_5_rtn: Optional[Decimal]
+
+    @classmethod
+    def build_record(cls, record: Tuple) -> "Holding":
+        res = cls()
+
+        res.gvkey = record[0]
+        res.winsorized_5_rtn = record[1]
+
+        return res
+
+    def as_tuple(self) -> Tuple:
+        return self.gvkey, self.winsorized_5_rtn
@@ -3,7 +3,8 @@
 from datetime import datetime
 from decimal import Decimal
 import logging
-from typing import Optional
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -11,53 +12,134 @@ logger = logging.getLogger(__name__)
 class MetricsData:
     """Metrics record object class."""
 
+    COLUMNS = (
+        "datadate",
+        "gvkey",
+        "utilization_pct_delta",
+        "bar_delta",
+        "age_delta",
+        "tickets_delta",
+        "units_delta",
+        "market_value_usd_delta",
+        "loan_rate_avg_delta",
+        "loan_rate_max_delta",
+        "loan_rate_min_delta",
+        "loan_rate_range_delta",
+        "loan_rate_stdev_delta",
+        "short_interest",
+        "short_ratio",
+        "market_cap",
+        "shares_out",
+        "volume",
+        "rtn",
+        "winsorized_5_rtn",
+    )
+
+    __slots__ = COLUMNS
+
+    # GETTER OF THE COLUMNS OUT OF ROWS OF A PROJECTION, PER PROJECTION.
+    _getters: Dict[Tuple[str, ...], Tuple[itemgetter, bool]] = {}
+
     datadate: datetime
     gvkey: int
 
-    utilization_pct_delta: Optional[Decimal] = None
-    bar_delta: Optional[int] = None
-    age_delta: Optional[Decimal] = None
-    tickets_delta: Optional[int] = None
-    units_delta: Optional[Decimal] = None
-    market_value_usd_delta: Optional[Decimal] = None
-    loan_rate_avg_delta: Optional[Decimal] = None
-    loan_rate_max_delta: Optional[Decimal] = None
-    loan_rate_min_delta: Optional[Decimal] = None
-    loan_rate_range_delta: Optional[Decimal] = None
-    loan_rate_stdev_delta: Optional[Decimal] = None
-
-    short_interest: Optional[Decimal] = None
-    short_ratio: Optional[Decimal] = None
-
-    market_cap: Optional[Decimal] = None
-    shares_out: Optional[Decimal] = None
-    volume: Optional[Decimal] = None
-    rtn: Optional[Decimal] = None
-    winsorized_5_rtn: Optional[Decimal] = None
+    utilization_pct_delta: Optional[Decimal]
+    bar_delta: Optional[int]
+    age_delta: Optional[Decimal]
+    tickets_delta: Optional[int]
+    units_delta: Optional[Decimal]
+    market_value_usd_delta: Optional[Decimal]
+    loan_rate_avg_delta: Optional[Decimal]
+    loan_rate_max_delta: Optional[Decimal]
+    loan_rate_min_delta: Optional[Decimal]
+    loan_rate_range_delta: Optional[Decimal]
+    loan_rate_stdev_delta: Optional[Decimal]
+
+    short_interest: Optional[Decimal]
+    short_ratio: Optional[Decimal]
+
+    market_cap: Optional[Decimal]
+    shares_out: Optional[Decimal]
+    volume: Optional[Decimal]
+    rtn: Optional[Decimal]
+    winsorized_5_rtn: Optional[Decimal]
+
+    @classmethod
+    def getter(cls, columns: Tuple[str, ...]) -> Tuple[itemgetter, bool]:
+        """Getter of every column out of rows of the given columns, cached.
+
+        Columns left out of the rows are read from a None appended to them,
+        the flag tells whether rows must be padded so.
+        """
+        getter = cls._getters.get(columns)
+        if getter is None:
+            index = {c: i for i, c in enumerate(columns)}
+            positions = [index.get(c, len(columns)) for c in cls.COLUMNS]
+            getter = (itemgetter(*positions), len(columns) in positions)
+            cls._getters[tuple(columns)] = getter
+
+        return getter
+
+    @classmethod
+    def build_record(
+        cls, record: Tuple, columns: Tuple[str, ...] = COLUMNS
+    ) -> "MetricsData":
+        """Builds a record object from a row, mapped by column position.
+
+        Args:
+            record: source row.
+            columns: column names of the row, in order. Columns left out of a
+                projected row are set to None.
+
+        Returns:
+            Record object.
+        """
+        return cls.build_records((record,), columns)[0]
 
     @classmethod
-    def build_record(cls, record) -> "MetricsData":
-        res = cls()
-
-        res.datadate = record[0]
-        res.gvkey = record[1]
-        res.utilization_pct_delta = record[2]
-        res.bar_delta = record[3]
-        res.age_delta = record[4]
-        res.tickets_delta = record[5]
-        res.units_delta = record[6]
-        res.market_value_usd_delta = record[7]
-        res.loan_rate_avg_delta = record[8]
-        res.loan_rate_max_delta = record[9]
-        res.loan_rate_min_delta = record[10]
-        res.loan_rate_range_delta = record[11]
-        res.loan_rate_stdev_delta = record[12]
-        res.short_interest = record[13]
-        res.short_ratio = record[14]
-        res.market_cap = record[15]
-        res.shares_out = record[16]
-        res.volume = record[17]
-        res.rtn = record[18]
-        res.winsorized_5_rtn = record[19]
+    def build_records(
+        cls, records: Iterable[Tuple], columns: Tuple[str, ...] = COLUMNS
+    ) -> List["MetricsData"]:
+        """Builds record objects from rows of the same columns.
+
+        Positions of the columns are resolved once for all the rows.
+
+        Args:
+            records: source rows.
+            columns: column names of the rows, in order. Columns left out of
+                projected rows are set to None.
+
+        Returns:
+            Record objects, in the order of the rows.
+        """
+        getter, padded = cls.getter(columns)
+        res = []
+        for record in records:
+            if padded:
+                record = (*record, None)
+            obj = cls()
+            (
+                obj.datadate,
+                obj.gvkey,
+                obj.utilization_pct_delta,
+                obj.bar_delta,
+                obj.age_delta,
+                obj.tickets_delta,
+                obj.units_delta,
+                obj.market_value_usd_delta,
+                obj.loan_rate_avg_delta,
+                obj.loan_rate_max_delta,
+                obj.loan_rate_min_delta,
+                obj.loan_rate_range_delta,
+                obj.loan_rate_stdev_delta,
+                obj.short_interest,
+                obj.short_ratio,
+                obj.market_cap,
+                obj.shares_out,
+                obj.volume,
+                obj.rtn,
+                obj.winsorized_5_rtn,
+            ) = getter(record)
+            res.append(obj)
 
         return res
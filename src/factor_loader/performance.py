@@ -0,0 +1,62 @@
+"""Running performance of the factor portfolios.
+
+The returns of every factor, timeframe, market cap class and top are folded
+into a ``FactorPerformance`` state one period at a time: running sums of the
+returns and of their squares, growth of 1, peak and drawdown, and a window of
+the last returns. New periods cost O(1) each, the history is never re-read.
+"""
+
+import copy
+from typing import Dict, Iterable, Tuple
+
+import factor_loader.model as model
+
+
+def fold_returns(
+    performance: Dict[Tuple, model.FactorPerformance],
+    rows: Iterable[Tuple],
+    window: int,
+) -> Dict[Tuple, model.FactorPerformance]:
+    """Folds factor returns into the running performance of their keys.
+
+    Rows up to the last date already folded into their key and rows without a
+    return are skipped, so folding the same rows twice changes nothing.
+
+    Args:
+        performance: running performance per (factor, timeframe, market cap
+            class, top), left untouched.
+        rows: rows laid out as factor_returns, in ascending date order.
+        window: number of last returns kept for the rolling volatility.
+
+    Returns:
+        Updated performance of the keys folded into.
+    """
+    res: Dict[Tuple, model.FactorPerformance] = {}
+    for row in rows:
+        datadate, rtn = row[0], row[7]
+        if rtn is None:
+            continue
+        key = tuple(row[1:5])
+        state = res.get(key) or performance.get(key)
+        if state is not None and state.last_date and datadate <= state.last_date:
+            continue
+        if key not in res:
+            state = copy.copy(state) or model.FactorPerformance.build_record(key)
+            state.window_rtns = list(state.window_rtns)
+            res[key] = state
+
+        r = float(rtn)
+        state.n_periods += 1
+        state.sum_rtn += r
+        state.sum_sq_rtn += r * r
+        state.wealth *= 1 + r
+        state.peak_wealth = max(state.peak_wealth, state.wealth)
+        state.drawdown = 1 - state.wealth / state.peak_wealth
+        state.max_drawdown = max(state.max_drawdown, state.drawdown)
+        state.window_rtns.append(r)
+        del state.window_rtns[:-window]
+        if state.first_date is None:
+            state.first_date = datadate
+        state.last_date = datadate
+
+    return res
@@ -1,9 +1,13 @@
 """Data source interactions."""
 
+from .cache import CachedSource
+from .database import ConnectionPool
 from .source import Source
 from .target import Target
 
 __all__ = [
+    "CachedSource",
+    "ConnectionPool",
     "Source",
     "Target",
 ]
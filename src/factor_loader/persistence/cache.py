@@ -0,0 +1,252 @@
+"""Read-through Parquet cache of source records."""
+
+from datetime import datetime, timedelta
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .database import ConnectionPool, retried
+from .source import Source
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+Watermark = Tuple[str, int]
+
+
+class CachedSource(Source):
+    """Source serving ``get_records`` from a local Parquet cache.
+
+    Records are cached per ``(timeframe, source_table, year)`` and marked with
+    the watermark of the year in the source, its max datadate and row count.
+    An entry is read back only while the watermark is unchanged. Only closed
+    years, before the latest year of the source table, are cached: the open
+    year keeps changing and is read from the source for the requested window.
+    Entries are evicted least recently used first once the cache exceeds
+    ``max_bytes``, across every source sharing the directory: an entry evicted
+    by another source before it is read is a cache miss.
+    """
+
+    # VERSIONED WITH THE LAYOUT OF THE ENTRIES: ENTRIES WRITTEN BEFORE ROWS
+    # WERE ORDERED BY DATE AND GVKEY HAVE NO WATERMARK UNDER THIS KEY.
+    _watermark_key = b"factor_loader.watermark.2"
+
+    def __init__(
+        self,
+        connection_string: str,
+        cache_dir: str,
+        max_bytes: int,
+        pool: Optional[ConnectionPool] = None,
+        numeric: str = "decimal",
+        retries: int = 3,
+        backoff: float = 1.0,
+    ) -> None:
+        if pq is None:
+            raise ImportError("pyarrow is required by the Parquet cache (CACHE_DIR).")
+        super().__init__(
+            connection_string,
+            pool=pool,
+            numeric=numeric,
+            retries=retries,
+            backoff=backoff,
+        )
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # LATEST YEAR OF EVERY SOURCE TABLE, READ ONCE PER SOURCE.
+        self.last_years: Dict[Tuple[str, str], int] = {}
+
+    def get_records(
+        self,
+        timeframe,
+        source_table,
+        date_range,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Tuple]:
+        """Fetch records with the provided keys, through the cache.
+
+        Entries hold every column, projections are read from them.
+
+        Args:
+            timeframe: timeframe.
+            source_table: Source table.
+            date_range: date range to get records from.
+            columns: columns to fetch, in order. Every column if not given.
+
+        Returns:
+            List of records with matching keys, ordered by date and gvkey.
+        """
+        watermarks = self.fetch_watermarks(timeframe, source_table, date_range)
+        last_year = self.get_last_year(timeframe, source_table)
+
+        res = []
+        cached = False
+        for year, watermark in sorted(watermarks.items()):
+            if year >= last_year:
+                open_range = (max(date_range[0], datetime(year, 1, 1)), date_range[1])
+                res.extend(
+                    super().get_records(timeframe, source_table, open_range, columns)
+                    or []
+                )
+                continue
+
+            path = self.path(timeframe, source_table, year)
+            if self.read_watermark(path) != watermark:
+                logger.debug(f"Caching {timeframe}_{source_table} {year}...")
+                year_columns, rows = self.fetch_year(timeframe, source_table, year)
+                self.write(path, watermark, year_columns, rows)
+                cached = True
+            try:
+                res.extend(self.read(path, date_range, columns))
+            except FileNotFoundError:
+                logger.debug(f"Cache miss on {path}, evicted meanwhile.")
+                year_range = (
+                    max(date_range[0], datetime(year, 1, 1)),
+                    min(
+                        date_range[1],
+                        datetime(year + 1, 1, 1) - timedelta(microseconds=1),
+                    ),
+                )
+                res.extend(
+                    super().get_records(timeframe, source_table, year_range, columns)
+                    or []
+                )
+
+        if cached:
+            self.evict()
+
+        return res if res else None
+
+    def get_last_year(self, timeframe, source_table) -> int:
+        """Latest year of a source table, fetched on first use."""
+        key = (timeframe, source_table)
+        if key not in self.last_years:
+            self.last_years[key] = self.fetch_last_year(timeframe, source_table)
+
+        return self.last_years[key]
+
+    @retried
+    def fetch_last_year(self, timeframe, source_table) -> int:
+        """Fetches the latest year of a source table, 0 if empty."""
+        cursor = self.cursor
+        query = (
+            "SELECT EXTRACT(YEAR FROM MAX(datadate))::INTEGER "
+            f"FROM {timeframe}_{source_table}; "
+        )
+        cursor.execute(query)
+        last_year = cursor.fetchone()[0]
+
+        return last_year or 0
+
+    @retried
+    def fetch_watermarks(
+        self, timeframe, source_table, date_range
+    ) -> Dict[int, Watermark]:
+        """Fetches the watermark of every year overlapping the date range."""
+        cursor = self.cursor
+        query = (
+            "SELECT EXTRACT(YEAR FROM datadate)::INTEGER, MAX(datadate), COUNT(*) "
+            f"FROM {timeframe}_{source_table} "
+            "WHERE datadate >= %s AND datadate < %s "
+            "GROUP BY 1; "
+        )
+        cursor.execute(
+            query,
+            (
+                datetime(date_range[0].year, 1, 1),
+                datetime(date_range[1].year + 1, 1, 1),
+            ),
+        )
+        rows = cursor.fetchall()
+
+        return {r[0]: (r[1].isoformat(), r[2]) for r in rows}
+
+    @retried
+    def fetch_year(self, timeframe, source_table, year) -> Tuple[List[str], List]:
+        """Fetches every record of a year, by date and gvkey, with the column names."""
+        cursor = self.cursor
+        query = (
+            "SELECT * "
+            f"FROM {timeframe}_{source_table} "
+            "WHERE datadate >= %s AND datadate < %s "
+            "ORDER BY datadate, gvkey; "
+        )
+        cursor.execute(query, (datetime(year, 1, 1), datetime(year + 1, 1, 1)))
+        columns = [d[0] for d in cursor.description]
+
+        return columns, cursor.fetchall()
+
+    def path(self, timeframe, source_table, year) -> str:
+        # DECIMAL AND FLOAT ENTRIES ARE KEPT APART.
+        return os.path.join(
+            self.cache_dir, self.numeric, timeframe, source_table, f"{year}.parquet"
+        )
+
+    def read_watermark(self, path: str) -> Optional[Watermark]:
+        """Watermark of a cache entry, None if missing or unreadable."""
+        try:
+            metadata = pq.read_schema(path).metadata or {}
+        except (OSError, pa.ArrowInvalid):
+            return None
+        watermark = metadata.get(self._watermark_key)
+
+        return tuple(json.loads(watermark)) if watermark else None
+
+    def read(
+        self, path: str, date_range, columns: Optional[Sequence[str]] = None
+    ) -> List[Tuple]:
+        """Reads the records of a cache entry within the date range."""
+        table = pq.read_table(
+            path,
+            columns=list(columns) if columns else None,
+            filters=[
+                ("datadate", ">=", date_range[0]),
+                ("datadate", "<=", date_range[1]),
+            ],
+        )
+        # MARKS THE ENTRY AS RECENTLY USED FOR EVICTION.
+        os.utime(path)
+
+        return list(zip(*(column.to_pylist() for column in table.columns)))
+
+    def write(self, path: str, watermark: Watermark, columns: List[str], rows: List):
+        """Writes a cache entry atomically."""
+        values = list(zip(*rows)) if rows else [()] * len(columns)
+        table = pa.Table.from_arrays(
+            [pa.array(v) for v in values], names=columns
+        ).replace_schema_metadata({self._watermark_key: json.dumps(watermark)})
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    def evict(self) -> None:
+        """Removes least recently used entries until the cache fits its budget."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                if file.endswith(".parquet"):
+                    path = os.path.join(root, file)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        size = sum(e[1] for e in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            logger.debug(f"Evicting {path}...")
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
@@ -0,0 +1,149 @@
+"""Pooled database connection with reconnect and retry."""
+
+import functools
+import logging
+import time
+from typing import Callable, Optional, TypeVar
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# ERRORS OF A LOST OR UNUSABLE CONNECTION, WORTH RECONNECTING FOR.
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+
+class ConnectionPool(ThreadedConnectionPool):
+    """Thread safe pool handing out healthy connections only.
+
+    Connections are checked with a round trip when taken from the pool, and
+    replaced by new ones if closed or unresponsive.
+    """
+
+    def getconn(self, key=None):
+        for _ in range(self.maxconn + 1):
+            connection = super().getconn(key)
+            if self.is_healthy(connection):
+                return connection
+            logger.warning("Discarding unhealthy connection...")
+            self.putconn(connection, key, close=True)
+
+        raise psycopg2.OperationalError("No healthy connection available.")
+
+    @staticmethod
+    def is_healthy(connection: psycopg2.extensions.connection) -> bool:
+        """Whether the connection is open and responsive."""
+        if connection.closed:
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1;")
+            connection.rollback()
+        except CONNECTION_ERRORS:
+            return False
+
+        return True
+
+
+def retried(method: Callable[..., T]) -> Callable[..., T]:
+    """Retries an idempotent method of a ``Database`` on connection errors."""
+
+    @functools.wraps(method)
+    def wrapper(self: "Database", *args, **kwargs) -> T:
+        return self.retry(lambda: method(self, *args, **kwargs))
+
+    return wrapper
+
+
+class Database:
+    """Connection taken from a pool, replaced and retried on connection errors.
+
+    Without a shared pool, the connection comes from a private pool of one.
+    """
+
+    def __init__(
+        self,
+        connection_string: str,
+        pool: Optional[ConnectionPool] = None,
+        retries: int = 3,
+        backoff: float = 1.0,
+    ) -> None:
+        self._connection_string = connection_string
+        self._owns_pool = pool is None
+        self._pool = pool or ConnectionPool(0, 1, connection_string)
+        self.retries = retries
+        self.backoff = backoff
+        self._connection: Optional[psycopg2.extensions.connection] = None
+        self._tx_cursor = None
+        # CONNECTS, RETRYING WHILE THE DATABASE IS UNREACHABLE.
+        self.retry(lambda: None)
+
+    @property
+    def cursor(self) -> psycopg2.extensions.cursor:
+        """Generate cursor.
+
+        Returns:
+            Cursor.
+        """
+        if self._tx_cursor is not None:
+            cursor = self._tx_cursor
+        else:
+            cursor = self._connection.cursor()
+
+        return cursor
+
+    def connect(self) -> psycopg2.extensions.connection:
+        """Takes a connection from the pool and configures it."""
+        connection = self._pool.getconn()
+        connection.autocommit = False
+        self.configure(connection)
+
+        return connection
+
+    def configure(self, connection: psycopg2.extensions.connection) -> None:
+        """Session settings of every connection, none by default."""
+
+    def discard(self) -> None:
+        """Closes the connection, rolling back its transaction, if any."""
+        if self._connection is not None:
+            self._pool.putconn(self._connection, close=True)
+            self._connection = None
+
+    def retry(self, fn: Callable[[], T]) -> T:
+        """Runs fn, reconnecting and running it again on connection errors.
+
+        Only idempotent work must be retried: a transaction interrupted by a
+        lost connection is rolled back and fn starts over from scratch.
+
+        Args:
+            fn: work to run, without arguments.
+
+        Returns:
+            Result of fn.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                if self._connection is None:
+                    self._connection = self.connect()
+                return fn()
+            except CONNECTION_ERRORS as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * 2**attempt
+                logger.warning(
+                    f"Connection error, retrying in {delay}s: {str(e).strip()}"
+                )
+                self.discard()
+                time.sleep(delay)
+
+    def disconnect(self) -> None:
+        """Disconnect from database."""
+        if self._connection is not None:
+            self._pool.putconn(self._connection)
+            self._connection = None
+        if self._owns_pool:
+            self._pool.closeall()
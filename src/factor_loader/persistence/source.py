@@ -1,38 +1,72 @@
 """Source."""
 
-from typing import List, Tuple
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 import psycopg2
 import psycopg2.extensions
 
+from .database import ConnectionPool, Database, retried
 
-class Source:
+# NUMERIC COLUMNS AS FLOAT INSTEAD OF DECIMAL.
+DECIMAL_AS_FLOAT = psycopg2.extensions.new_type(
+    psycopg2.extensions.DECIMAL.values,
+    "DECIMAL_AS_FLOAT",
+    lambda value, cursor: float(value) if value is not None else None,
+)
+
+
+class Source(Database):
     """Source class."""
 
-    def __init__(self, connection_string: str) -> None:
-        self._connection_string = connection_string
-        self._connection = psycopg2.connect(connection_string)
-        self._connection.autocommit = False
-        self._tx_cursor = None
+    def __init__(
+        self,
+        connection_string: str,
+        pool: Optional[ConnectionPool] = None,
+        numeric: str = "decimal",
+        retries: int = 3,
+        backoff: float = 1.0,
+    ) -> None:
+        self.numeric = numeric
+        super().__init__(connection_string, pool=pool, retries=retries, backoff=backoff)
+
+    def configure(self, connection: psycopg2.extensions.connection) -> None:
+        """Reads NUMERIC columns as float in the float numeric mode."""
+        if self.numeric == "float":
+            psycopg2.extensions.register_type(DECIMAL_AS_FLOAT, connection)
 
-    @property
-    def cursor(self) -> psycopg2.extensions.cursor:
-        """Generate cursor.
+    @staticmethod
+    def projection(columns: Optional[Sequence[str]] = None) -> str:
+        """Select list of the given columns, every column if not given."""
+        return ", ".join(columns) if columns else "*"
+
+    @staticmethod
+    def bucketed(
+        timeframe, source_table, mkt_cap_ranges: Dict[str, Tuple[int, int]]
+    ) -> Tuple[str, str, List]:
+        """Market cap buckets of the rows of a source table.
+
+        Args:
+            timeframe: timeframe.
+            source_table: Source table.
+            mkt_cap_ranges: market cap class and its (exclusive, inclusive] range.
 
         Returns:
-            Cursor.
+            The buckets CTE, the FROM clause joining the source table ``s`` to
+            its buckets ``b``, and the parameters of the CTE.
         """
-        if self._tx_cursor is not None:
-            cursor = self._tx_cursor
-        else:
-            cursor = self._connection.cursor()
-
-        return cursor
+        values = ", ".join(["(%s, %s, %s)"] * len(mkt_cap_ranges))
+        cte = f"buckets (mkt_cap_class, min_mkt_cap, max_mkt_cap) AS (VALUES {values})"
+        join = (
+            f"FROM {timeframe}_{source_table} s "
+            "JOIN buckets b "
+            "ON s.market_cap > b.min_mkt_cap AND s.market_cap <= b.max_mkt_cap "
+        )
+        params = [v for c, r in mkt_cap_ranges.items() for v in (c, *r)]
 
-    def disconnect(self) -> None:
-        """Disconnect from database."""
-        self._connection.close()
+        return cte, join, params
 
+    @retried
     def fetch_configs(self):
         """Fetches every run configuration."""
         cursor = self.cursor
@@ -45,6 +79,7 @@ class Source:
 
         return configs
 
+    @retried
     def fetch_us_keys(self):
         """Fetches U.S. gvkeys."""
         cursor = self.cursor
@@ -54,25 +89,279 @@ class Source:
 
         return [k[0] for k in keys] if keys else None
 
-    def get_records(self, timeframe, source_table, date_range) -> List[Tuple]:
+    @retried
+    def fetch_date_counts(
+        self, timeframe, source_table, after: Optional[datetime] = None
+    ) -> List[Tuple[datetime, int]]:
+        """Fetches the distinct dates of a source table with their row count.
+
+        Args:
+            timeframe: timeframe.
+            source_table: Source table.
+            after: only dates strictly after this one, if given.
+
+        Returns:
+            List of dates and row counts, ordered by date.
+        """
+        cursor = self.cursor
+        query = f"SELECT datadate, COUNT(*) FROM {timeframe}_{source_table} "
+        if after is not None:
+            query += "WHERE datadate > %s "
+        query += "GROUP BY datadate ORDER BY datadate; "
+
+        cursor.execute(query, (after,) if after is not None else None)
+
+        return cursor.fetchall()
+
+    @retried
+    def fetch_dates(self, timeframe, source_table, date_range) -> List[datetime]:
+        """Fetches the distinct dates of a source table within a date range."""
+        cursor = self.cursor
+        query = (
+            "SELECT DISTINCT datadate "
+            f"FROM {timeframe}_{source_table} "
+            "WHERE datadate BETWEEN %s AND %s "
+            "ORDER BY datadate; "
+        )
+        cursor.execute(query, (date_range[0], date_range[1]))
+
+        return [d[0] for d in cursor.fetchall()]
+
+    @retried
+    def fetch_selections(
+        self,
+        timeframe,
+        source_table,
+        date_range,
+        mkt_cap_ranges: Dict[str, Tuple[int, int]],
+        factor: Optional[str] = None,
+        selection_amount: Optional[int] = None,
+    ) -> List[Tuple]:
+        """Fetches the rows selected by a factor per date and market cap class.
+
+        Rows are bucketed by market cap and, unless no factor is given, ranked
+        by the factor within each date and bucket. Only the selection_amount
+        lowest and highest ranked rows are returned, with gvkey as tie-breaker.
+        Without a factor every row of the buckets is returned, by gvkey.
+
+        Args:
+            timeframe: timeframe.
+            source_table: Source table.
+            date_range: date range to get records from.
+            mkt_cap_ranges: market cap class and its (exclusive, inclusive] range.
+            factor: factor column to rank by.
+            selection_amount: rows selected at each end of the ranking.
+
+        Returns:
+            Date, market cap class, gvkey and winsorized_5_rtn of the selected
+            rows, in ascending order of the factor.
+        """
+        cursor = self.cursor
+        buckets, bucketed, params = self.bucketed(
+            timeframe, source_table, mkt_cap_ranges
+        )
+        params += [date_range[0], date_range[1]]
+        if factor is None:
+            order = "gvkey"
+            ranked = ""
+            where = ""
+            selected = ""
+        else:
+            order = "factor_value, gvkey"
+            ranked = (
+                f", s.{factor} AS factor_value, "
+                "ROW_NUMBER() OVER (PARTITION BY s.datadate, b.mkt_cap_class "
+                f"ORDER BY s.{factor}, s.gvkey) AS flop_rank, "
+                "ROW_NUMBER() OVER (PARTITION BY s.datadate, b.mkt_cap_class "
+                f"ORDER BY s.{factor} DESC, s.gvkey DESC) AS top_rank "
+            )
+            where = f"AND s.{factor} IS NOT NULL "
+            selected = "WHERE flop_rank <= %s OR top_rank <= %s "
+            params += [selection_amount, selection_amount]
+        query = (
+            f"WITH {buckets}, "
+            "ranked AS ("
+            f"SELECT s.datadate, b.mkt_cap_class, s.gvkey, s.winsorized_5_rtn{ranked} "
+            f"{bucketed}"
+            f"WHERE s.datadate BETWEEN %s AND %s {where}) "
+            "SELECT datadate, mkt_cap_class, gvkey, winsorized_5_rtn "
+            f"FROM ranked {selected}"
+            f"ORDER BY datadate, mkt_cap_class, {order}; "
+        )
+        cursor.execute(query, params)
+
+        return cursor.fetchall()
+
+    @retried
+    def fetch_quantiles(
+        self,
+        timeframe,
+        source_table,
+        date_range,
+        mkt_cap_ranges: Dict[str, Tuple[int, int]],
+        factor: str,
+        quantiles: List[int],
+    ) -> List[Tuple]:
+        """Fetches the sum and size of the quantiles of a factor per bucket.
+
+        Rows are bucketed by market cap and ranked by the factor within each
+        date and bucket, with gvkey as tie-breaker. The row ranked i of n falls
+        in quantile i * quantiles // n, counting from 0.
+
+        Args:
+            timeframe: timeframe.
+            source_table: Source table.
+            date_range: date range to get records from.
+            mkt_cap_ranges: market cap class and its (exclusive, inclusive] range.
+            factor: factor column to rank by.
+            quantiles: numbers of quantiles.
+
+        Returns:
+            Date, market cap class, number of quantiles, quantile, sum of
+            winsorized_5_rtn and number of rows of every non-empty quantile.
+        """
+        cursor = self.cursor
+        buckets, bucketed, params = self.bucketed(
+            timeframe, source_table, mkt_cap_ranges
+        )
+        splits = ", ".join(["(%s)"] * len(quantiles))
+        params += list(quantiles)
+        params += [date_range[0], date_range[1]]
+        query = (
+            f"WITH {buckets}, "
+            f"splits (quantiles) AS (VALUES {splits}), "
+            "ranked AS ("
+            "SELECT s.datadate, b.mkt_cap_class, s.winsorized_5_rtn, "
+            "ROW_NUMBER() OVER (PARTITION BY s.datadate, b.mkt_cap_class "
+            f"ORDER BY s.{factor}, s.gvkey) - 1 AS rank, "
+            "COUNT(*) OVER (PARTITION BY s.datadate, b.mkt_cap_class) AS size "
+            f"{bucketed}"
+            f"WHERE s.datadate BETWEEN %s AND %s AND s.{factor} IS NOT NULL) "
+            "SELECT r.datadate, r.mkt_cap_class, q.quantiles, "
+            "r.rank * q.quantiles / r.size AS quantile, "
+            "SUM(r.winsorized_5_rtn), COUNT(*) "
+            "FROM ranked r CROSS JOIN splits q "
+            "GROUP BY 1, 2, 3, 4 "
+            "ORDER BY 1, 2, 3, 4; "
+        )
+        cursor.execute(query, params)
+
+        return cursor.fetchall()
+
+    @retried
+    def fetch_ic(
+        self,
+        timeframe,
+        source_table,
+        date_range,
+        mkt_cap_ranges: Dict[str, Tuple[int, int]],
+        factor: str,
+    ) -> List[Tuple]:
+        """Fetches the rank IC of a factor per date and market cap class.
+
+        Args:
+            timeframe: timeframe.
+            source_table: Source table.
+            date_range: date range to get records from.
+            mkt_cap_ranges: market cap class and its (exclusive, inclusive] range.
+            factor: factor column to rank by.
+
+        Returns:
+            Date, market cap class, rank IC and number of rows of every
+            non-empty bucket.
+        """
+        cursor = self.cursor
+        buckets, bucketed, params = self.bucketed(
+            timeframe, source_table, mkt_cap_ranges
+        )
+        params += [date_range[0], date_range[1]]
+        # TIED VALUES SHARE THE AVERAGE OF THEIR RANKS.
+        bucket = "s.datadate, b.mkt_cap_class"
+        query = (
+            f"WITH {buckets}, "
+            "ranked AS ("
+            "SELECT s.datadate, b.mkt_cap_class, "
+            f"RANK() OVER (PARTITION BY {bucket} ORDER BY s.{factor}) "
+            f"+ (COUNT(*) OVER (PARTITION BY {bucket}, s.{factor}) - 1) / 2.0 "
+            "AS factor_rank, "
+            f"RANK() OVER (PARTITION BY {bucket} ORDER BY s.winsorized_5_rtn) "
+            f"+ (COUNT(*) OVER (PARTITION BY {bucket}, s.winsorized_5_rtn) - 1) "
+            "/ 2.0 AS rtn_rank "
+            f"{bucketed}"
+            f"WHERE s.datadate BETWEEN %s AND %s AND s.{factor} IS NOT NULL) "
+            "SELECT datadate, mkt_cap_class, CORR(factor_rank, rtn_rank), COUNT(*) "
+            "FROM ranked "
+            "GROUP BY 1, 2 "
+            "ORDER BY 1, 2; "
+        )
+        cursor.execute(query, params)
+
+        return cursor.fetchall()
+
+    @retried
+    def get_records(
+        self,
+        timeframe,
+        source_table,
+        date_range,
+        columns: Optional[Sequence[str]] = None,
+    ) -> List[Tuple]:
         """Fetch records with the provided keys.
 
         Args:
             timeframe: timeframe.
             source_table: Source table.
             date_range: date range to get records from.
+            columns: columns to fetch, in order. Every column if not given.
 
         Returns:
-            List of records with matching keys.
+            List of records with matching keys, ordered by date and gvkey.
         """
         cursor = self.cursor
         query = (
-            "SELECT * "
+            f"SELECT {self.projection(columns)} "
             f"FROM {timeframe}_{source_table} "
-            "WHERE datadate between %s and %s; "
+            "WHERE datadate between %s and %s "
+            "ORDER BY datadate, gvkey; "
         ).format(timeframe=timeframe, source_table=source_table)
 
         cursor.execute(query, (date_range[0], date_range[1]))
         res = cursor.fetchall()
 
         return res if res else None
+
+    def stream_records(
+        self,
+        timeframe,
+        source_table,
+        date_range,
+        itersize: int = 10_000,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Iterator[Tuple]:
+        """Stream records ordered by date and gvkey through a server-side cursor.
+
+        Args:
+            timeframe: timeframe.
+            source_table: Source table.
+            date_range: date range to get records from.
+            itersize: rows fetched from the server per round trip. Not retried,
+                rows already yielded cannot be taken back.
+            columns: columns to fetch, in order. Every column if not given.
+
+        Returns:
+            Iterator over the records, ordered by date and gvkey.
+        """
+        cursor = self._connection.cursor(name=f"{timeframe}_{source_table}_stream")
+        cursor.itersize = itersize
+        query = (
+            f"SELECT {self.projection(columns)} "
+            f"FROM {timeframe}_{source_table} "
+            "WHERE datadate between %s and %s "
+            "ORDER BY datadate, gvkey; "
+        )
+
+        try:
+            cursor.execute(query, (date_range[0], date_range[1]))
+            yield from cursor
+        finally:
+            cursor.close()
@@ -1,51 +1,122 @@
 """Target."""
 
-from typing import List, Tuple
+import csv
+from datetime import datetime
+import io
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
-import psycopg2
-import psycopg2.extensions
 from psycopg2.extras import execute_values
 
+import factor_loader.model as model
+from factor_loader.queries import FactorPerformanceQueries
 
-class Target:
-    """Target class."""
+from .database import ConnectionPool, Database, retried
 
-    def __init__(self, connection_string: str) -> None:
-        self._connection_string = connection_string
-        self._connection = psycopg2.connect(connection_string)
-        self._connection.autocommit = False
-        self._tx_cursor = None
 
-    @property
-    def cursor(self) -> psycopg2.extensions.cursor:
-        """Generate cursor.
+class Target(Database):
+    """Target class.
 
-        Returns:
-            Cursor.
-        """
-        if self._tx_cursor is not None:
-            cursor = self._tx_cursor
-        else:
-            cursor = self._connection.cursor()
+    Writes are not retried one by one: a transaction interrupted by a lost
+    connection is rolled back, so whole batches are retried with ``retry``.
+    """
 
-        return cursor
+    def __init__(
+        self,
+        connection_string: str,
+        pool: Optional[ConnectionPool] = None,
+        retries: int = 3,
+        backoff: float = 1.0,
+    ) -> None:
+        super().__init__(connection_string, pool=pool, retries=retries, backoff=backoff)
 
     def commit_transaction(self) -> None:
         """Commits a transaction."""
         self._connection.commit()
 
-    def disconnect(self) -> None:
-        """Disconnect from database."""
-        self._connection.close()
+    @retried
+    def fetch_checkpoints(self, timeframe: str) -> Dict[str, datetime]:
+        """Fetches the last persisted date of every config of a timeframe."""
+        cursor = self.cursor
+        query = (
+            "SELECT factor, last_date_persisted FROM factor_loader_config "
+            "WHERE timeframe = %s AND last_date_persisted IS NOT NULL;"
+        )
+        cursor.execute(query, (timeframe.upper(),))
+        checkpoints = cursor.fetchall()
+
+        return {factor.lower(): last_date for factor, last_date in checkpoints}
 
-    def fetch_last_date_persisted(self, timeframe: str):
-        """Fetches minimum of the last persisted dates."""
+    @retried
+    def fetch_performance(self, timeframe: str) -> Dict[Tuple, model.FactorPerformance]:
+        """Fetches the running performance of every key of a timeframe."""
         cursor = self.cursor
-        query = "SELECT MIN(last_date_persisted) FROM factor_loader_config WHERE timeframe = %s;"
+        query = (
+            "SELECT factor, timeframe, mkt_cap_class, top, first_date, last_date, "
+            "n_periods, sum_rtn, sum_sq_rtn, wealth, peak_wealth, drawdown, "
+            "max_drawdown, window_rtns FROM factor_performance WHERE timeframe = %s;"
+        )
         cursor.execute(query, (timeframe.upper(),))
-        last_date = cursor.fetchone()
+        performance = cursor.fetchall()
+
+        return {
+            tuple(record[:4]): model.FactorPerformance.build_record(record)
+            for record in performance
+        }
+
+    def stream_returns(
+        self,
+        timeframe: str,
+        factors: Optional[Sequence[str]] = None,
+        itersize: int = 10_000,
+    ) -> Iterator[Tuple]:
+        """Stream the stored returns of a timeframe ordered by date.
+
+        Args:
+            timeframe: timeframe.
+            factors: factors to stream, every factor if not given.
+            itersize: rows fetched from the server per round trip. Not retried,
+                rows already yielded cannot be taken back.
+
+        Returns:
+            Iterator over the leading columns of factor_returns, up to rtn.
+        """
+        cursor = self._connection.cursor(name=f"{timeframe}_returns_stream")
+        cursor.itersize = itersize
+        query = (
+            "SELECT datadate, factor, timeframe, mkt_cap_class, top, "
+            "long_rtn, short_rtn, rtn FROM factor_returns WHERE timeframe = %s "
+        )
+        params: Tuple = (timeframe.upper(),)
+        if factors:
+            query += "AND factor = ANY(%s) "
+            params += ([f.upper() for f in factors],)
+        query += "ORDER BY datadate; "
+
+        try:
+            cursor.execute(query, params)
+            yield from cursor
+        finally:
+            cursor.close()
 
-        return last_date[0] if last_date else None
+    def delete_performance(
+        self, timeframe: str, factors: Optional[Sequence[str]] = None
+    ) -> None:
+        """Deletes the running performance of a timeframe, within the transaction.
+
+        Args:
+            timeframe: timeframe.
+            factors: factors to delete, every factor if not given.
+        """
+        cursor = self.cursor
+        if factors:
+            cursor.execute(
+                FactorPerformanceQueries.DELETE_FACTORS,
+                (timeframe.upper(), [f.upper() for f in factors]),
+            )
+        else:
+            cursor.execute(
+                FactorPerformanceQueries.DELETE_TIMEFRAME, (timeframe.upper(),)
+            )
 
     def execute(self, query: str, records: List[Tuple]) -> None:
         """Execute batch of records into database.
@@ -56,3 +127,35 @@ class Target:
         """
         cursor = self.cursor
         execute_values(cur=cursor, sql=query, argslist=records)
+
+    def copy_upsert(
+        self, stage_query: str, copy_query: str, merge_query: str, records: List[Tuple]
+    ) -> None:
+        """Bulk upsert records through a staging table.
+
+        Records are streamed into the staging table with COPY and merged into
+        the target table with a single set-based upsert.
+
+        Args:
+            stage_query: query creating the staging table.
+            copy_query: COPY ... FROM STDIN query, in CSV format.
+            merge_query: query merging the staging table into the target table.
+            records: records to persist.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for record in records:
+            writer.writerow(
+                [self.copy_array(v) if isinstance(v, list) else v for v in record]
+            )
+        buffer.seek(0)
+
+        cursor = self.cursor
+        cursor.execute(stage_query)
+        cursor.copy_expert(copy_query, buffer)
+        cursor.execute(merge_query)
+
+    @staticmethod
+    def copy_array(values: List) -> str:
+        """Array literal of a list of numbers, as read by COPY."""
+        return "{" + ",".join("NULL" if v is None else str(v) for v in values) + "}"
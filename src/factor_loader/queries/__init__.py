@@ -1,10 +1,16 @@
 """Queries implementation."""
 
 from .factor_loader_config import Queries as ConfigQueries
+from .factor_ic import Queries as FactorICQueries
+from .factor_performance import Queries as FactorPerformanceQueries
+from .factor_quantile_returns import Queries as FactorQuantileReturnsQueries
 from .factor_returns import Queries as FactorReturnsQueries
 
 
 __all__ = [
     "ConfigQueries",
+    "FactorICQueries",
+    "FactorPerformanceQueries",
+    "FactorQuantileReturnsQueries",
     "FactorReturnsQueries",
 ]
@@ -0,0 +1,77 @@
+"""Factor IC queries."""
+
+
+class Queries:
+    """Factor IC queries class."""
+
+    # ROWS IDENTICAL TO THE STORED ONES ARE LEFT UNTOUCHED, NO DEAD TUPLES.
+    UPSERT = (
+        "INSERT INTO factor_ic ("
+        "       datadate, "
+        "       factor, "
+        "       timeframe, "
+        "       mkt_cap_class, "
+        "       ic, "
+        "       n_gvkeys "
+        ") VALUES %s "
+        "ON CONFLICT (datadate, factor, timeframe, mkt_cap_class) DO "
+        "UPDATE SET "
+        "       ic=EXCLUDED.ic, "
+        "       n_gvkeys=EXCLUDED.n_gvkeys "
+        "WHERE ("
+        "       factor_ic.ic, "
+        "       factor_ic.n_gvkeys "
+        ") IS DISTINCT FROM ("
+        "       EXCLUDED.ic, "
+        "       EXCLUDED.n_gvkeys "
+        "); "
+    )
+
+    # SESSION SCOPED, NOT WAL LOGGED AND PRIVATE TO EACH CONNECTION.
+    CREATE_STAGE = (
+        "CREATE TEMP TABLE IF NOT EXISTS factor_ic_stage "
+        "(LIKE factor_ic INCLUDING DEFAULTS) "
+        "ON COMMIT DELETE ROWS; "
+    )
+
+    COPY_STAGE = (
+        "COPY factor_ic_stage ("
+        "       datadate, "
+        "       factor, "
+        "       timeframe, "
+        "       mkt_cap_class, "
+        "       ic, "
+        "       n_gvkeys "
+        ") FROM STDIN WITH (FORMAT csv); "
+    )
+
+    MERGE_STAGE = (
+        "INSERT INTO factor_ic ("
+        "       datadate, "
+        "       factor, "
+        "       timeframe, "
+        "       mkt_cap_class, "
+        "       ic, "
+        "       n_gvkeys "
+        ") "
+        "SELECT "
+        "       datadate, "
+        "       factor, "
+        "       timeframe, "
+        "       mkt_cap_class, "
+        "       ic, "
+        "       n_gvkeys "
+        "FROM factor_ic_stage "
+        "ON CONFLICT (datadate, factor, timeframe, mkt_cap_class) DO "
+        "UPDATE SET "
+        "       ic=EXCLUDED.ic, "
+        "       n_gvkeys=EXCLUDED.n_gvkeys "
+        "WHERE ("
+        "       factor_ic.ic, "
+        "       factor_ic.n_gvkeys "
+        ") IS DISTINCT FROM ("
+        "       EXCLUDED.ic, "
+        "       EXCLUDED.n_gvkeys "
+        "); "
+        "TRUNCATE factor_ic_stage; "
+    )
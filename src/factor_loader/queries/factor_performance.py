@@ -0,0 +1,42 @@
+"""Factor performance queries."""
+
+
+class Queries:
+    """Factor performance queries class."""
+
+    UPSERT = (
+        "INSERT INTO factor_performance ("
+        "       factor, "
+        "       timeframe, "
+        "       mkt_cap_class, "
+        "       top, "
+        "       first_date, "
+        "       last_date, "
+        "       n_periods, "
+        "       sum_rtn, "
+        "       sum_sq_rtn, "
+        "       wealth, "
+        "       peak_wealth, "
+        "       drawdown, "
+        "       max_drawdown, "
+        "       window_rtns "
+        ") VALUES %s "
+        "ON CONFLICT (factor, timeframe, mkt_cap_class, top) DO "
+        "UPDATE SET "
+        "       first_date=EXCLUDED.first_date, "
+        "       last_date=EXCLUDED.last_date, "
+        "       n_periods=EXCLUDED.n_periods, "
+        "       sum_rtn=EXCLUDED.sum_rtn, "
+        "       sum_sq_rtn=EXCLUDED.sum_sq_rtn, "
+        "       wealth=EXCLUDED.wealth, "
+        "       peak_wealth=EXCLUDED.peak_wealth, "
+        "       drawdown=EXCLUDED.drawdown, "
+        "       max_drawdown=EXCLUDED.max_drawdown, "
+        "       window_rtns=EXCLUDED.window_rtns; "
+    )
+
+    DELETE_TIMEFRAME = "DELETE FROM factor_performance WHERE timeframe = %s; "
+
+    DELETE_FACTORS = (
+        "DELETE FROM factor_performance " "WHERE timeframe = %s AND factor = ANY(%s); "
+    )
@@ -0,0 +1,101 @@
+"""Factor Quantile Returns queries."""
+
+
+class Queries:
+    """Factor Quantile Returns queries class."""
+
+    # ROWS IDENTICAL TO THE STORED ONES ARE LEFT UNTOUCHED, NO DEAD TUPLES.
+    UPSERT = (
+        "INSERT INTO factor_quantile_returns ("
+        "       datadate, "
+        "       factor, "
+        "       timeframe, "
+        "       mkt_cap_class, "
+        "       quantiles, "
+        "       quantile_rtns, "
+        "       quantile_sizes, "
+        "       spread_rtn, "
+        "       consistent "
+        ") VALUES %s "
+        "ON CONFLICT (datadate, factor, timeframe, mkt_cap_class, quantiles) DO "
+        "UPDATE SET "
+        "       quantile_rtns=EXCLUDED.quantile_rtns, "
+        "       quantile_sizes=EXCLUDED.quantile_sizes, "
+        "       spread_rtn=EXCLUDED.spread_rtn, "
+        "       consistent=EXCLUDED.consistent "
+        "WHERE ("
+        "       factor_quantile_returns.quantile_rtns, "
+        "       factor_quantile_returns.quantile_sizes, "
+        "       factor_quantile_returns.spread_rtn, "
+        "       factor_quantile_returns.consistent "
+        ") IS DISTINCT FROM ("
+        "       EXCLUDED.quantile_rtns, "
+        "       EXCLUDED.quantile_sizes, "
+        "       EXCLUDED.spread_rtn, "
+        "       EXCLUDED.consistent "
+        "); "
+    )
+
+    # SESSION SCOPED, NOT WAL LOGGED AND PRIVATE TO EACH CONNECTION.
+    CREATE_STAGE = (
+        "CREATE TEMP TABLE IF NOT EXISTS factor_quantile_returns_stage "
+        "(LIKE factor_quantile_returns INCLUDING DEFAULTS) "
+        "ON COMMIT DELETE ROWS; "
+    )
+
+    COPY_STAGE = (
+        "COPY factor_quantile_returns_stage ("
+        "       datadate, "
+        "       factor, "
+        "       timeframe, "
+        "       mkt_cap_class, "
+        "       quantiles, "
+        "       quantile_rtns, "
+        "       quantile_sizes, "
+        "       spread_rtn, "
+        "       consistent "
+        ") FROM STDIN WITH (FORMAT csv); "
+    )
+
+    MERGE_STAGE = (
+        "INSERT INTO factor_quantile_returns ("
+        "       datadate, "
+        "       factor, "
+        "       timeframe, "
+        "       mkt_cap_class, "
+        "       quantiles, "
+        "       quantile_rtns, "
+        "       quantile_sizes, "
+        "       spread_rtn, "
+        "       consistent "
+        ") "
+        "SELECT "
+        "       datadate, "
+        "       factor, "
+        "       timeframe, "
+        "       mkt_cap_class, "
+        "       quantiles, "
+        "       quantile_rtns, "
+        "       quantile_sizes, "
+        "       spread_rtn, "
+        "       consistent "
+        "FROM factor_quantile_returns_stage "
+        "ON CONFLICT (datadate, factor, timeframe, mkt_cap_class, quantiles) DO "
+        "UPDATE SET "
+        "       quantile_rtns=EXCLUDED.quantile_rtns, "
+        "       quantile_sizes=EXCLUDED.quantile_sizes, "
+        "       spread_rtn=EXCLUDED.spread_rtn, "
+        "       consistent=EXCLUDED.consistent "
+        "WHERE ("
+        "       factor_quantile_returns.quantile_rtns, "
+        "       factor_quantile_returns.quantile_sizes, "
+        "       factor_quantile_returns.spread_rtn, "
+        "       factor_quantile_returns.consistent "
+        ") IS DISTINCT FROM ("
+        "       EXCLUDED.quantile_rtns, "
+        "       EXCLUDED.quantile_sizes, "
+        "       EXCLUDED.spread_rtn, "
+        "       EXCLUDED.consistent "
+        "); "
+        "TRUNCATE factor_quantile_returns_stage; "
+    )
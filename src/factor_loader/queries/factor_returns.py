@@ -4,6 +4,7 @@
 class Queries:
     """Factor Returns queries class."""
 
+    # ROWS IDENTICAL TO THE STORED ONES ARE LEFT UNTOUCHED, NO DEAD TUPLES.
     UPSERT = (
         "INSERT INTO factor_returns ("
         "       datadate, "
@@ -15,7 +16,8 @@ class Queries:
         "       short_rtn, "
         "       rtn, "
         "       consistent, "
-        "       gvkeys "
+        "       long_gvkeys, "
+        "       short_gvkeys "
         ") VALUES %s "
         "ON CONFLICT (datadate, factor, timeframe, mkt_cap_class, top) DO "
         "UPDATE SET "
@@ -28,5 +30,97 @@ class Queries:
         "       short_rtn=EXCLUDED.short_rtn, "
         "       rtn=EXCLUDED.rtn, "
         "       consistent=EXCLUDED.consistent, "
-        "       gvkeys=EXCLUDED.gvkeys; "
+        "       long_gvkeys=EXCLUDED.long_gvkeys, "
+        "       short_gvkeys=EXCLUDED.short_gvkeys "
+        "WHERE ("
+        "       factor_returns.long_rtn, "
+        "       factor_returns.short_rtn, "
+        "       factor_returns.rtn, "
+        "       factor_returns.consistent, "
+        "       factor_returns.long_gvkeys, "
+        "       factor_returns.short_gvkeys "
+        ") IS DISTINCT FROM ("
+        "       EXCLUDED.long_rtn, "
+        "       EXCLUDED.short_rtn, "
+        "       EXCLUDED.rtn, "
+        "       EXCLUDED.consistent, "
+        "       EXCLUDED.long_gvkeys, "
+        "       EXCLUDED.short_gvkeys "
+        "); "
+    )
+
+    # SESSION SCOPED, NOT WAL LOGGED AND PRIVATE TO EACH CONNECTION.
+    CREATE_STAGE = (
+        "CREATE TEMP TABLE IF NOT EXISTS factor_returns_stage "
+        "(LIKE factor_returns INCLUDING DEFAULTS) "
+        "ON COMMIT DELETE ROWS; "
+    )
+
+    COPY_STAGE = (
+        "COPY factor_returns_stage ("
+        "       datadate, "
+        "       factor, "
+        "       timeframe, "
+        "       mkt_cap_class, "
+        "       top, "
+        "       long_rtn, "
+        "       short_rtn, "
+        "       rtn, "
+        "       consistent, "
+        "       long_gvkeys, "
+        "       short_gvkeys "
+        ") FROM STDIN WITH (FORMAT csv); "
+    )
+
+    MERGE_STAGE = (
+        "INSERT INTO factor_returns ("
+        "       datadate, "
+        "       factor, "
+        "       timeframe, "
+        "       mkt_cap_class, "
+        "       top, "
+        "       long_rtn, "
+        "       short_rtn, "
+        "       rtn, "
+        "       consistent, "
+        "       long_gvkeys, "
+        "       short_gvkeys "
+        ") "
+        "SELECT "
+        "       datadate, "
+        "       factor, "
+        "       timeframe, "
+        "       mkt_cap_class, "
+        "       top, "
+        "       long_rtn, "
+        "       short_rtn, "
+        "       rtn, "
+        "       consistent, "
+        "       long_gvkeys, "
+        "       short_gvkeys "
+        "FROM factor_returns_stage "
+        "ON CONFLICT (datadate, factor, timeframe, mkt_cap_class, top) DO "
+        "UPDATE SET "
+        "       long_rtn=EXCLUDED.long_rtn, "
+        "       short_rtn=EXCLUDED.short_rtn, "
+        "       rtn=EXCLUDED.rtn, "
+        "       consistent=EXCLUDED.consistent, "
+        "       long_gvkeys=EXCLUDED.long_gvkeys, "
+        "       short_gvkeys=EXCLUDED.short_gvkeys "
+        "WHERE ("
+        "       factor_returns.long_rtn, "
+        "       factor_returns.short_rtn, "
+        "       factor_returns.rtn, "
+        "       factor_returns.consistent, "
+        "       factor_returns.long_gvkeys, "
+        "       factor_returns.short_gvkeys "
+        ") IS DISTINCT FROM ("
+        "       EXCLUDED.long_rtn, "
+        "       EXCLUDED.short_rtn, "
+        "       EXCLUDED.rtn, "
+        "       EXCLUDED.consistent, "
+        "       EXCLUDED.long_gvkeys, "
+        "       EXCLUDED.short_gvkeys "
+        "); "
+        "TRUNCATE factor_returns_stage; "
     )
@@ -0,0 +1,62 @@
+"""Worker process side of the parallel config execution."""
+
+from datetime import datetime
+import logging
+from typing import Dict, List, Tuple
+
+from factor_loader import columnar
+import factor_loader.model as model
+
+logger = logging.getLogger(__name__)
+
+_mkt_cap_ranges: Dict[str, Tuple[int, int]] = {}
+_selection_amounts: List[int] = []
+_quantiles: List[int] = []
+_ic = False
+
+
+def init_worker(
+    mkt_cap_ranges: Dict[str, Tuple[int, int]],
+    selection_amounts: List[int],
+    quantiles: List[int],
+    ic: bool,
+) -> None:
+    """Receives the settings of the run once per worker process."""
+    global _mkt_cap_ranges, _selection_amounts, _quantiles, _ic
+
+    _mkt_cap_ranges = mkt_cap_ranges
+    _selection_amounts = selection_amounts
+    _quantiles = quantiles
+    _ic = ic
+
+
+def run_configs(
+    packed_history: Dict, configs: List[model.Config]
+) -> List[Dict[str, List[Tuple]]]:
+    """Runs configurations through the packed history of a window."""
+    history = columnar.unpack_history(packed_history)
+
+    return [run_config(history, config) for config in configs]
+
+
+def run_config(
+    history: Dict[datetime, columnar.CrossSection], config: model.Config
+) -> Dict[str, List[Tuple]]:
+    """Runs a configuration through a history."""
+    res: Dict[str, List[Tuple]] = {}
+    for d in sorted(history.keys()):
+        if not config.is_pending(d):
+            continue
+        records = columnar.run_date(
+            d,
+            history[d],
+            config,
+            _mkt_cap_ranges,
+            _selection_amounts,
+            quantiles=_quantiles,
+            ic=_ic,
+        )
+        for table, rows in records.items():
+            res.setdefault(table, []).extend(rows)
+
+    return res